@@ -5,10 +5,12 @@ import logging
 from typing import Dict, List
 import webbrowser
 import threading
+import queue
 
 from services.csv_parser import CSVParser
-from services.transaction_finder import group_similar_transactions, identify_recurring_transactions
-from services.link_finder import LinkFinder
+from services.transaction_finder import group_similar_transactions, identify_recurring_transactions, summarize_recurring_transactions
+from services.link_finder import LinkFinder, DEFAULT_SEARCH_CACHE_FILE
+from services.analysis_cache import AnalysisCache
 from models.transaction import Transaction
 
 logger = logging.getLogger(__name__)
@@ -21,8 +23,17 @@ class AppWindow:
         self.root.geometry("1200x720")  # Increased from 1000x600 (20% larger)
         
         # Initialize services
-        self.link_finder = LinkFinder()
+        self.link_finder = LinkFinder(search_cache_file=DEFAULT_SEARCH_CACHE_FILE)
         self.csv_parser = CSVParser()
+        self.analysis_cache = AnalysisCache()
+        
+        # GUI updates from the worker thread are queued and run on the Tk thread
+        self._ui_queue = queue.Queue()
+        self.root.after(50, self._drain_ui_queue)
+        
+        # Latest status update not yet shown; bursts of updates are coalesced into one
+        self._pending_status = None
+        self._status_lock = threading.Lock()
         
         # Create the main layout
         self._create_widgets()
@@ -35,6 +46,9 @@ class AppWindow:
         
         # Store transaction amounts for updating total
         self.transaction_amounts = {}
+        
+        # Sort keys for each treeview row, by column name
+        self.row_keys: Dict[str, dict] = {}
     
     def _create_widgets(self):
         """Create and layout all GUI widgets."""
@@ -91,23 +105,58 @@ class AppWindow:
         self.tree.bind('<Button-1>', self._on_click)
         
         # Add scrollbar
-        scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
         
         # Pack the treeview and scrollbar
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         # Total savings label
         self.savings_var = tk.StringVar(value="Potential Monthly Savings: $0.00")
         ttk.Label(self.root, textvariable=self.savings_var, padding="10").pack()
     
+    def _run_on_ui_thread(self, func, *args):
+        """Queue a callable to be run on the Tk main thread."""
+        self._ui_queue.put((func, args))
+    
+    def _drain_ui_queue(self):
+        """Run all queued GUI updates, then reschedule the next poll."""
+        try:
+            while True:
+                try:
+                    func, args = self._ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                # One failing update must not drop the ones queued after it
+                try:
+                    func(*args)
+                except Exception as e:
+                    logger.exception(f"GUI update {getattr(func, '__name__', func)} failed: {str(e)}")
+        finally:
+            self.root.after(50, self._drain_ui_queue)
+    
     def _update_status(self, message: str, progress: float = None):
-        """Update status message and progress bar."""
+        """
+        Update status message and progress bar. Safe to call from any thread.
+        
+        Updates arriving faster than the UI queue is drained replace each other,
+        so only the latest one is applied to the widgets.
+        """
+        with self._status_lock:
+            already_queued = self._pending_status is not None
+            self._pending_status = (message, progress)
+        if not already_queued:
+            self._run_on_ui_thread(self._set_status)
+    
+    def _set_status(self):
+        """Apply the latest status update. Must run on the Tk main thread."""
+        with self._status_lock:
+            message, progress = self._pending_status
+            self._pending_status = None
         self.status_var.set(message)
         if progress is not None:
             self.progress_var.set(progress)
-        self.root.update_idletasks()
     
     def _start_analysis(self):
         """Start analysis in a separate thread to keep GUI responsive."""
@@ -119,6 +168,7 @@ class AppWindow:
         # Clear previous results
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self.row_keys.clear()
         
         # Reset progress and status
         self.progress_var.set(0)
@@ -130,65 +180,96 @@ class AppWindow:
         thread.start()
     
     def _analyze_statements(self):
-        """Analyze CSV statements in the selected folder."""
+        """
+        Analyze CSV statements in the selected folder.
+        
+        Runs on a worker thread, so all widget updates go through the UI queue.
+        """
         try:
             folder = self.folder_path_var.get()
             
             # Reset column headers
-            for col in self.tree["columns"]:
-                self.tree.heading(col, text=col)
+            self._run_on_ui_thread(self._reset_headings)
             
-            # Parse CSVs and extract transactions
-            self._update_status("Reading CSV files...", 10)
-            all_transactions = self.csv_parser.parse_directory(folder)
+            # Reuse previous results if the statements haven't changed
+            cache_key = self.analysis_cache.make_key(self.csv_parser.list_csv_files(folder))
+            recurring_transactions = self.analysis_cache.load(cache_key)
             
-            if not all_transactions:
-                self._update_status("No transactions found", 0)
-                messagebox.showwarning("No Transactions", "No transactions found in the selected CSVs.")
-                return
+            if recurring_transactions is None:
+                # Parse CSVs and extract transactions
+                self._update_status("Reading CSV files...", 10)
+                all_transactions = self.csv_parser.parse_directory(folder)
+                
+                if not all_transactions:
+                    self._update_status("No transactions found", 0)
+                    self._run_on_ui_thread(messagebox.showwarning, "No Transactions", "No transactions found in the selected CSVs.")
+                    return
+                
+                # Group similar transactions
+                self._update_status("Grouping similar transactions...", 40)
+                grouped = group_similar_transactions(all_transactions)
+                
+                # Identify recurring transactions
+                self._update_status("Identifying recurring transactions...", 70)
+                recurring_transactions = identify_recurring_transactions(grouped)
+                self.analysis_cache.save(cache_key, recurring_transactions)
             
-            # Group similar transactions
-            self._update_status("Grouping similar transactions...", 40)
-            grouped = group_similar_transactions(all_transactions)
+            # Build the result rows
+            self._update_status("Updating results...", 90)
+            rows = []
             
-            # Identify recurring transactions
-            self._update_status("Identifying recurring transactions...", 70)
-            self.recurring_transactions = identify_recurring_transactions(grouped)
+            # Monthly cost is the average amount, credit card is the most recent one used
+            summaries = summarize_recurring_transactions(recurring_transactions)
+            # Look up all cancellation links in one batch
+            cancel_links = self.link_finder.get_cancellation_links(list(summaries))
+            for merchant, (monthly_cost, credit_card, frequency) in summaries.items():
+                rows.append((merchant, monthly_cost, credit_card, frequency, cancel_links[merchant]))
             
-            # Update the treeview
-            self._update_status("Updating results...", 90)
-            self.total_savings = 0.0
+            self._run_on_ui_thread(self._show_results, recurring_transactions, rows)
+            self._update_status("Analysis complete!", 100)
             
-            for merchant, transactions in self.recurring_transactions.items():
-                # Calculate monthly cost (average of transaction amounts)
-                monthly_cost = sum(t.amount for t in transactions) / len(transactions)
+        except Exception as e:
+            logger.error(f"Error analyzing statements: {str(e)}")
+            self._update_status(f"Error: {str(e)}", 0)
+            self._run_on_ui_thread(messagebox.showerror, "Error", f"Failed to analyze statements: {str(e)}")
+    
+    def _reset_headings(self):
+        """Remove sort indicators from the column headers."""
+        for col in self.tree["columns"]:
+            self.tree.heading(col, text=col)
+    
+    def _show_results(self, recurring_transactions: Dict[str, List[Transaction]], rows: list):
+        """Populate the treeview and total savings. Must run on the Tk main thread."""
+        self.recurring_transactions = recurring_transactions
+        self.total_savings = 0.0
+        
+        # Detach the scrollbar while bulk loading so it is only updated once at the end
+        self.tree.configure(yscrollcommand='')
+        try:
+            for merchant, monthly_cost, credit_card, frequency, cancel_link in rows:
                 self.total_savings += monthly_cost
                 
-                # Get cancellation link
-                cancel_link = self.link_finder.get_cancellation_link(merchant)
-                
-                # Get credit card (use the most recent transaction's card)
-                recent_transaction = max(transactions, key=lambda t: t.date)
-                credit_card = recent_transaction.credit_card
-                
                 # Add to treeview with X button
-                self.tree.insert("", tk.END, values=(
+                item = self.tree.insert("", tk.END, values=(
                     "❌",  # Remove button
                     merchant,
                     f"${monthly_cost:.2f}",
                     credit_card,
-                    f"{len(transactions)} times",
+                    f"{frequency} times",
                     cancel_link or "N/A"
                 ))
-            
-            # Update total savings
-            self.savings_var.set(f"Potential Monthly Savings: ${self.total_savings:.2f}")
-            self._update_status("Analysis complete!", 100)
-            
-        except Exception as e:
-            logger.error(f"Error analyzing statements: {str(e)}")
-            self._update_status(f"Error: {str(e)}", 0)
-            messagebox.showerror("Error", f"Failed to analyze statements: {str(e)}")
+                self.row_keys[item] = {
+                    "Merchant": merchant,
+                    "Monthly Cost": monthly_cost,
+                    "Credit Card": credit_card,
+                    "Frequency": frequency,
+                    "Cancel Link": cancel_link or "N/A"
+                }
+        finally:
+            self.tree.configure(yscrollcommand=self.scrollbar.set)
+        
+        # Update total savings
+        self.savings_var.set(f"Potential Monthly Savings: ${self.total_savings:.2f}")
     
     def _on_click(self, event):
         """Handle click events on the treeview."""
@@ -206,8 +287,7 @@ class AppWindow:
     
     def _remove_item(self, item):
         """Remove an item from the treeview and update total savings."""
-        values = self.tree.item(item)['values']
-        amount = float(values[2].replace('$', '').replace(',', ''))
+        amount = self.row_keys.pop(item)["Monthly Cost"]
         self.total_savings -= amount
         self.savings_var.set(f"Potential Monthly Savings: ${self.total_savings:.2f}")
         self.tree.delete(item)
@@ -220,20 +300,16 @@ class AppWindow:
             self.sort_reverse = False
             self.sort_column = column
         
-        items = [(self.tree.set(item, column), item) for item in self.tree.get_children("")]
-        
-        # Convert amounts to float for proper numeric sorting
-        if column == "Monthly Cost":
-            items = [(float(amount.replace("$", "").replace(",", "")), item) for amount, item in items]
-        elif column == "Frequency":
-            # Extract the number from "X times" format for sorting
-            items = [(int(freq.split()[0]), item) for freq, item in items]
-        
-        # Sort the items
-        items.sort(reverse=self.sort_reverse)
+        # Sort on the raw values stored at insert time, so amounts and
+        # frequencies sort numerically without re-parsing the cell text
+        items = sorted(
+            self.tree.get_children(""),
+            key=lambda item: self.row_keys[item][column],
+            reverse=self.sort_reverse
+        )
         
         # Rearrange items in sorted positions
-        for index, (val, item) in enumerate(items):
+        for index, item in enumerate(items):
             self.tree.move(item, "", index)
         
         # Update sort indicator
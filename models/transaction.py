@@ -1,11 +1,43 @@
+import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
 from typing import Optional
 
-@dataclass
+# Currency symbols and thousands separators removed from amount strings
+_AMOUNT_DELETE = str.maketrans('', '', '$,')
+
+def parse_mdy(date_str: str) -> datetime:
+    """
+    Parse a MM/DD/YYYY date string.
+    
+    Zero-padded dates are sliced directly, which is much faster than
+    datetime.strptime. Anything else falls back to strptime.
+    
+    Raises:
+        ValueError: If the string is not a valid MM/DD/YYYY date
+    """
+    if len(date_str) == 10 and date_str[2] == '/' and date_str[5] == '/':
+        return datetime(int(date_str[6:10]), int(date_str[0:2]), int(date_str[3:5]))
+    return datetime.strptime(date_str, "%m/%d/%Y")
+
+@lru_cache(maxsize=4096)
+def format_mdy(date: datetime) -> str:
+    """
+    Format a date as a MM/DD/YYYY string.
+    
+    Equivalent to date.strftime("%m/%d/%Y") but much cheaper, and cached since
+    statements repeat the same dates across many transactions.
+    """
+    return f"{date.month:02d}/{date.day:02d}/{date.year:04d}"
+
+@dataclass(slots=True, frozen=True)
 class Transaction:
     """
     Represents a single transaction from a bank statement.
+    
+    Transactions are immutable and slotted: they carry no per-instance
+    __dict__ and can be hashed, e.g. to deduplicate them in a set.
     """
     date: datetime
     merchant: str
@@ -30,7 +62,7 @@ class Transaction:
         """
         # Parse date
         try:
-            date = datetime.strptime(date_str.strip(), "%m/%d/%Y")
+            date = parse_mdy(date_str.strip())
         except ValueError:
             raise ValueError(f"Invalid date format: {date_str}. Expected MM/DD/YYYY")
         
@@ -40,22 +72,22 @@ class Transaction:
             if not amount_str:
                 raise ValueError("Amount string cannot be empty")
                 
-            # Remove currency symbol, commas, and whitespace
-            clean_amount = amount_str.replace("$", "").replace(",", "").strip()
-            amount = float(clean_amount)
+            # Remove currency symbol and commas in one pass; float() ignores surrounding whitespace
+            amount = float(amount_str.translate(_AMOUNT_DELETE))
         except (ValueError, AttributeError) as e:
             raise ValueError(f"Invalid amount format: {amount_str}. Error: {str(e)}")
         
+        # Merchant and card names repeat across a statement, so share one string for each
         return cls(
             date=date,
-            merchant=merchant.strip(),
+            merchant=sys.intern(merchant.strip()),
             amount=amount,
-            credit_card=credit_card.strip(),
+            credit_card=sys.intern(credit_card.strip()),
             description=description.strip() if description else None
         )
     
     def __str__(self) -> str:
         """String representation of the transaction."""
-        date_str = self.date.strftime("%m/%d/%Y")
+        date_str = format_mdy(self.date)
         desc = f" - {self.description}" if self.description else ""
         return f"{date_str} | {self.merchant} | ${self.amount:.2f} | {self.credit_card}{desc}" 
\ No newline at end of file
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+import os
+import pickle
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'recurring-tx')
+
+# Bump when the pickled result format or the analysis that produces it changes
+# (e.g. merchant grouping or normalization rules), so stale entries are ignored.
+# 2: merchants join their best-matching group; grouping keys are lowercased as a whole
+# 3: merchant name noise is removed in sequential passes again
+# 4: similarity scores are rounded before the grouping threshold is applied
+CACHE_VERSION = 4
+
+class AnalysisCache:
+    """
+    Disk cache for results computed from statement files.
+    
+    Used for recurring transaction analysis results (Dict[str, List[Transaction]])
+    and for the text lines extracted from PDFs (List[str]); any picklable value
+    can be stored. Results are keyed by the state of the statement files they
+    were computed from, so any added, removed or modified file produces a new key.
+    """
+    def __init__(self, cache_dir: str = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            cache_dir (str, optional): Directory to store cached results in
+        """
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    
+    def make_key(self, file_paths: List[str]) -> str:
+        """
+        Build a cache key from the path, modification time and size of each file.
+        
+        Args:
+            file_paths (List[str]): Paths of the statement files
+            
+        Returns:
+            str: Hex digest identifying the current state of the files
+        """
+        state = sorted(
+            (os.path.abspath(path), os.path.getmtime(path), os.path.getsize(path))
+            for path in file_paths
+        )
+        # blake2b is fast and collision resistance is not a concern here
+        return hashlib.blake2b(repr((CACHE_VERSION, state)).encode()).hexdigest()
+    
+    def _path_for(self, key: str) -> str:
+        """Get the cache file path for a key."""
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+    
+    def load(self, key: str) -> Optional[Any]:
+        """
+        Load cached results.
+        
+        Args:
+            key (str): Cache key from make_key
+            
+        Returns:
+            Optional[Any]: Cached results, None on a miss
+        """
+        path = self._path_for(key)
+        if not os.path.exists(path):
+            return None
+        
+        try:
+            with open(path, 'rb') as f:
+                results = pickle.load(f)
+            logger.info(f"Loaded cached results from {path}")
+            return results
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache file {path}: {str(e)}")
+            return None
+    
+    def save(self, key: str, results: Any) -> None:
+        """
+        Save results to the cache.
+        
+        Args:
+            key (str): Cache key from make_key
+            results (Any): Picklable results, e.g. recurring transactions by merchant
+        """
+        path = self._path_for(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial pickle
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Failed to save cache file {path}: {str(e)}")
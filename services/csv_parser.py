@@ -1,13 +1,35 @@
 import csv
-from typing import List, Optional
+import re
+from typing import Callable, List, Optional, Sequence
 import logging
 from datetime import datetime
 import os
-from models.transaction import Transaction
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+from models.transaction import Transaction, parse_mdy
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Read buffer for statement files; large enough to read most files in one go
+READ_BUFFER_SIZE = 1 << 20
+
+# Directories smaller than this in total are parsed in the calling process;
+# starting a worker pool costs more than parsing a few statements
+PARALLEL_MIN_BYTES = 4 << 20
+
+@lru_cache(maxsize=4096)
+def _parse_date(date_str: str) -> datetime:
+    """
+    Parse a MM/DD/YYYY date string.
+    
+    Statements repeat the same handful of dates across many rows, so results
+    are cached and each distinct date is only parsed once.
+    """
+    return parse_mdy(date_str)
+
 class CSVParser:
     """Parser for credit card statement CSV files."""
     
@@ -16,6 +38,14 @@ class CSVParser:
             'AMEX': self._parse_amex_row,
             'CHASE': self._parse_chase_row
         }
+        # Columns each row parser reads, in the order it unpacks them
+        self.format_columns = {
+            'AMEX': ('Date', 'Description', 'Amount'),
+            'CHASE': ('Date', 'Description', 'Status', 'Debit', 'Credit')
+        }
+        # Descriptions of transactions that should be skipped
+        self._amex_skip_re = re.compile(r'PAYMENT RECEIVED|INTEREST CHARGE|ANNUAL FEE', re.IGNORECASE)
+        self._chase_skip_re = re.compile(r'PAYMENT', re.IGNORECASE)
     
     def _detect_format(self, header: List[str]) -> str:
         """Detect the CSV format based on the header row."""
@@ -28,53 +58,55 @@ class CSVParser:
         else:
             raise ValueError(f"Unsupported CSV format. Header: {header}")
     
-    def _parse_amex_row(self, row: dict, credit_card: str) -> Optional[Transaction]:
-        """Parse a row from an Amex CSV file."""
+    def _parse_amex_row(self, row: List[str], get_fields: Callable[[List[str]], Sequence[str]], credit_card: str) -> Optional[Transaction]:
+        """Parse a row from an Amex CSV file, given a getter for its Date, Description and Amount fields."""
         try:
+            date_str, description, amount_str = get_fields(row)
+            
             # Skip certain transaction types
-            if any(skip in row['Description'].upper() for skip in [
-                'PAYMENT RECEIVED', 'INTEREST CHARGE', 'ANNUAL FEE'
-            ]):
+            if self._amex_skip_re.search(description):
                 return None
                 
-            date = datetime.strptime(row['Date'], '%m/%d/%Y')
-            amount = float(row['Amount'])
+            date = _parse_date(date_str)
+            amount = float(amount_str)
             
             return Transaction(
                 date=date,
-                merchant=row['Description'].strip(),
+                merchant=sys.intern(description.strip()),  # Recurring merchants share one string
                 amount=abs(amount),  # Use absolute value since Amex uses positive for charges
                 credit_card=credit_card
             )
-        except (ValueError, KeyError) as e:
+        except (ValueError, IndexError) as e:
             logger.warning(f"Failed to parse Amex row: {row}. Error: {str(e)}")
             return None
     
-    def _parse_chase_row(self, row: dict, credit_card: str) -> Optional[Transaction]:
-        """Parse a row from a Chase CSV file."""
+    def _parse_chase_row(self, row: List[str], get_fields: Callable[[List[str]], Sequence[str]], credit_card: str) -> Optional[Transaction]:
+        """Parse a row from a Chase CSV file, given a getter for its Date, Description, Status, Debit and Credit fields."""
         try:
+            date_str, description, status, debit, credit = get_fields(row)
+            
             # Skip payments and pending transactions
-            if (row['Status'].upper() != 'CLEARED' or
-                'PAYMENT' in row['Description'].upper()):
+            if (status.upper() != 'CLEARED' or
+                self._chase_skip_re.search(description)):
                 return None
                 
-            date = datetime.strptime(row['Date'], '%m/%d/%Y')
+            date = _parse_date(date_str)
             
             # Chase uses separate debit/credit columns
-            amount = float(row['Debit'] or '0') or -float(row['Credit'] or '0')
+            amount = float(debit or '0') or -float(credit or '0')
             
             # Clean up description (remove card numbers and null values)
-            description = row['Description'].strip('"')
+            description = description.strip('"')
             description = description.split(' null ')[0]
             description = description.split(' XXXXXXXXXXXX')[0]
             
             return Transaction(
                 date=date,
-                merchant=description.strip(),
+                merchant=sys.intern(description.strip()),  # Recurring merchants share one string
                 amount=abs(amount),  # Use absolute value for consistency
                 credit_card=credit_card
             )
-        except (ValueError, KeyError) as e:
+        except (ValueError, IndexError) as e:
             logger.warning(f"Failed to parse Chase row: {row}. Error: {str(e)}")
             return None
     
@@ -91,20 +123,28 @@ class CSVParser:
         transactions = []
         
         # Extract credit card name from filename
-        credit_card = os.path.splitext(os.path.basename(file_path))[0]
+        credit_card = sys.intern(os.path.splitext(os.path.basename(file_path))[0])
         
         try:
-            with open(file_path, 'r') as f:
+            with open(file_path, 'r', buffering=READ_BUFFER_SIZE, newline='') as f:
                 # Read the header to detect format
-                reader = csv.DictReader(f)
-                csv_format = self._detect_format(reader.fieldnames)
+                reader = csv.reader(f)
+                header = next(reader, [])
+                csv_format = self._detect_format(header)
                 parse_row = self.supported_formats[csv_format]
                 
+                # Resolve the needed columns to positions once; rows are then
+                # unpacked with a single C-level itemgetter call each
+                columns = {name: i for i, name in enumerate(header)}
+                get_fields = itemgetter(*(columns[name] for name in self.format_columns[csv_format]))
+                
                 logger.info(f"Detected {csv_format} format for {file_path}")
                 
                 # Parse each row
                 for row in reader:
-                    transaction = parse_row(row, credit_card)
+                    if not row:  # Skip blank lines
+                        continue
+                    transaction = parse_row(row, get_fields, credit_card)
                     if transaction:
                         transactions.append(transaction)
                         
@@ -114,27 +154,73 @@ class CSVParser:
         
         return transactions
     
-    def parse_directory(self, directory_path: str) -> List[Transaction]:
+    def list_csv_files(self, directory_path: str) -> List[str]:
+        """
+        List the CSV files in a directory.
+        
+        Args:
+            directory_path (str): Path to directory containing CSV files
+            
+        Returns:
+            List[str]: Paths of the CSV files, in directory listing order
+        """
+        with os.scandir(directory_path) as entries:
+            return [
+                entry.path
+                for entry in entries
+                if entry.name.lower().endswith('.csv') and entry.is_file()
+            ]
+    
+    def parse_directory(self, directory_path: str, use_processes: bool = True,
+                        max_workers: Optional[int] = None) -> List[Transaction]:
         """
         Parse all CSV files in a directory.
         
+        Files are parsed in parallel, one job per file, once the directory holds
+        more than PARALLEL_MIN_BYTES of statements; smaller directories and single
+        files are parsed in-process. Results are combined in directory listing
+        order regardless of which worker finishes first.
+        
         Args:
             directory_path (str): Path to directory containing CSV files
+            use_processes (bool): Use a process pool (default). Set to False to
+                fall back to a thread pool, e.g. on Windows or low-memory machines
+            max_workers (int, optional): Pool size, defaults to os.cpu_count()
             
         Returns:
             List[Transaction]: Combined list of transactions from all files
         """
         all_transactions = []
         
-        for filename in os.listdir(directory_path):
-            if filename.lower().endswith(('.csv', '.CSV')):
-                file_path = os.path.join(directory_path, filename)
+        file_paths = self.list_csv_files(directory_path)
+        if not file_paths:
+            return all_transactions
+        
+        max_workers = min(max_workers or os.cpu_count() or 1, len(file_paths))
+        if max_workers == 1 or sum(map(os.path.getsize, file_paths)) < PARALLEL_MIN_BYTES:
+            # Worker startup would outweigh the parsing itself; stay in this process
+            for file_path in file_paths:
+                filename = os.path.basename(file_path)
                 try:
                     transactions = self.parse_csv(file_path)
                     logger.info(f"Extracted {len(transactions)} transactions from {filename}")
                     all_transactions.extend(transactions)
                 except Exception as e:
                     logger.error(f"Failed to process {filename}: {str(e)}")
+            return all_transactions
+        
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        
+        with executor_class(max_workers=max_workers) as executor:
+            futures = [executor.submit(self.parse_csv, file_path) for file_path in file_paths]
+            for file_path, future in zip(file_paths, futures):
+                filename = os.path.basename(file_path)
+                try:
+                    transactions = future.result()
+                    logger.info(f"Extracted {len(transactions)} transactions from {filename}")
+                    all_transactions.extend(transactions)
+                except Exception as e:
+                    logger.error(f"Failed to process {filename}: {str(e)}")
         
         return all_transactions
 
@@ -1,29 +1,54 @@
 import json
 import os
-from typing import Optional
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
 import logging
-from thefuzz import process
+import numpy as np
+from rapidfuzz import fuzz, process, utils
 import requests
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+from services.merchant_normalize import clean_merchant_name
 import time
-import re
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SEARCH_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'recurring-tx', 'search_cache.sqlite')
+
+# Cached web search results older than this are searched again
+SEARCH_CACHE_TTL = 30 * 24 * 60 * 60
+
+# Seconds to wait for a web search response
+SEARCH_TIMEOUT = 10
+
+def _bigrams(text: str) -> Set[str]:
+    """Get the set of character bigrams of a name, ignoring case, punctuation and spaces."""
+    text = utils.default_process(text).replace(' ', '')
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
 class LinkFinder:
     """
     Service to find cancellation links for merchants.
     """
-    def __init__(self, merchants_file: str = None):
+    def __init__(self, merchants_file: str = None, search_cache_file: str = None):
         """
         Initialize the LinkFinder with a known merchants database.
         
         Args:
             merchants_file (str, optional): Path to the JSON file containing merchant -> link mappings
+            search_cache_file (str, optional): Path to a SQLite database to persist web search
+                results in across runs. Results are only kept in memory if not given.
         """
         self.known_merchants = {}
         self.cache = {}  # Cache for scraped results
+        self.search_cache_file = search_cache_file
+        self._search_db = None  # Connection to the persistent search cache, if any
+        self._search_db_lock = threading.Lock()
+        self.link_cache = {}  # Cache for resolved cancellation links
+        self.session = requests.Session()  # Reuses connections across searches
         self.last_request_time = 0  # For rate limiting
+        self._rate_limit_lock = threading.Lock()
         self.min_request_interval = 1  # Minimum seconds between requests
         
         if merchants_file is None:
@@ -37,16 +62,98 @@ class LinkFinder:
                 logger.info(f"Loaded {len(self.known_merchants)} merchants from {merchants_file}")
             except Exception as e:
                 logger.error(f"Failed to load merchants file {merchants_file}: {str(e)}")
+        
+        self._build_index()
+        self._open_search_cache()
+    
+    def _open_search_cache(self) -> None:
+        """Open the persistent web search cache, creating it if needed."""
+        if not self.search_cache_file:
+            return
+        
+        try:
+            os.makedirs(os.path.dirname(self.search_cache_file) or '.', exist_ok=True)
+            # Autocommit, and allow use from the GUI's worker thread; access is serialized by a lock
+            self._search_db = sqlite3.connect(self.search_cache_file, isolation_level=None, check_same_thread=False)
+            self._search_db.execute(
+                'CREATE TABLE IF NOT EXISTS search_results '
+                '(merchant TEXT PRIMARY KEY, url TEXT NOT NULL, found_at REAL NOT NULL)'
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Not persisting search results, can't open {self.search_cache_file}: {str(e)}")
+            self._search_db = None
+    
+    def _load_search_result(self, merchant: str) -> Optional[str]:
+        """Get an unexpired web search result saved by a previous run, None if there is none."""
+        if self._search_db is None:
+            return None
+        
+        try:
+            with self._search_db_lock:
+                row = self._search_db.execute(
+                    'SELECT url FROM search_results WHERE merchant = ? AND found_at > ?',
+                    (merchant, time.time() - SEARCH_CACHE_TTL)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read search cache {self.search_cache_file}: {str(e)}")
+            return None
+        return row[0] if row else None
+    
+    def _cache_search_result(self, merchant: str, url: str) -> None:
+        """Cache a web search result and persist it if a cache file was given."""
+        self.cache[merchant] = url
+        if self._search_db is None:
+            return
+        
+        try:
+            with self._search_db_lock:
+                self._search_db.execute(
+                    'INSERT OR REPLACE INTO search_results VALUES (?, ?, ?)',
+                    (merchant, url, time.time())
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save search cache {self.search_cache_file}: {str(e)}")
+    
+    def _build_index(self) -> None:
+        """
+        Build a bigram inverted index over the known merchant names.
+        
+        Fuzzy matching only scores merchants sharing at least one bigram with
+        the query; a name with no bigram in common cannot reach a useful score.
+        """
+        self._merchant_keys: List[str] = list(self.known_merchants)
+        self._bigram_index: dict[str, List[int]] = {}
+        self._unindexed: List[int] = []  # Names too short to have any bigrams
+        # Processed name -> first known merchant with it; only an identical name scores 100
+        self._exact_keys: dict[str, str] = {}
+        
+        for i, key in enumerate(self._merchant_keys):
+            self._exact_keys.setdefault(utils.default_process(key), key)
+            bigrams = _bigrams(key)
+            if not bigrams:
+                self._unindexed.append(i)
+            for bigram in bigrams:
+                self._bigram_index.setdefault(bigram, []).append(i)
+    
+    def _candidate_indices(self, merchant: str) -> List[int]:
+        """Get the database positions of known merchant names sharing at least one bigram with a merchant name."""
+        bigrams = _bigrams(merchant)
+        if not bigrams:
+            return list(range(len(self._merchant_keys)))
+        
+        candidates = set(self._unindexed)
+        for bigram in bigrams:
+            candidates.update(self._bigram_index.get(bigram, ()))
+        # Keep database order so ties resolve the same way as a full scan
+        return sorted(candidates)
+    
+    def _candidate_merchants(self, merchant: str) -> List[str]:
+        """Get the known merchant names sharing at least one bigram with a merchant name."""
+        return [self._merchant_keys[i] for i in self._candidate_indices(merchant)]
     
     def _normalize_merchant(self, merchant: str) -> str:
         """Normalize merchant name for comparison."""
-        # Remove common prefixes and suffixes
-        merchant = re.sub(r'^(AplPay|APLPAY)\s+', '', merchant, flags=re.IGNORECASE)
-        merchant = re.sub(r'\s*(Inc\.|LLC|Ltd\.|Corp\.|#\d+).*$', '', merchant, flags=re.IGNORECASE)
-        # Remove location information
-        merchant = re.sub(r'\s+(?:in|at)\s+.*$', '', merchant, flags=re.IGNORECASE)
-        merchant = re.sub(r'\s+[A-Z]{2}(?:\s+|$)', ' ', merchant)  # Remove state codes
-        return merchant.strip()
+        return clean_merchant_name(merchant)
     
     def _search_google(self, merchant: str) -> Optional[str]:
         """
@@ -56,11 +163,18 @@ class LinkFinder:
         # Check cache first
         if merchant in self.cache:
             return self.cache[merchant]
+        
+        url = self._load_search_result(merchant)
+        if url is not None:
+            self.cache[merchant] = url
+            return url
             
-        # Rate limiting
-        current_time = time.time()
-        if current_time - self.last_request_time < self.min_request_interval:
-            time.sleep(self.min_request_interval)
+        # Rate limiting: reserve the next request slot, so concurrent searches still
+        # start at least min_request_interval apart while their responses overlap
+        with self._rate_limit_lock:
+            start_time = max(time.time(), self.last_request_time + self.min_request_interval)
+            self.last_request_time = start_time
+        time.sleep(max(0, start_time - time.time()))
         
         try:
             # Construct search query
@@ -71,29 +185,28 @@ class LinkFinder:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
-            response = requests.get(search_url, headers=headers)
-            self.last_request_time = time.time()
+            response = self.session.get(search_url, headers=headers, timeout=SEARCH_TIMEOUT)
             
-            if response.status_code == 200:
+            if response.status_code == 200 and response.text.strip():  # lxml can't parse an empty document
                 # Parse the response
-                soup = BeautifulSoup(response.text, 'lxml')
+                tree = lxml_html.fromstring(response.text)
                 
-                # Look for relevant results
-                for result in soup.select('.g'):
-                    title = result.select_one('h3')
-                    link = result.select_one('a')
+                # Look for relevant results (elements with the "g" class)
+                for result in tree.xpath('//*[contains(concat(" ", normalize-space(@class), " "), " g ")]'):
+                    titles = result.xpath('(.//h3)[1]')
+                    links = result.xpath('(.//a/@href)[1]')
                     
-                    if title and link:
-                        title_text = title.get_text().lower()
-                        if any(keyword in title_text for keyword in ['cancel', 'subscription', 'account']):
-                            url = link['href']
+                    if titles and links:
+                        title_text = titles[0].text_content().lower()
+                        if any(keyword in title_text for keyword in ('cancel', 'subscription', 'account')):
+                            url = str(links[0])
                             # Cache the result
-                            self.cache[merchant] = url
+                            self._cache_search_result(merchant, url)
                             return url
             
             # If no specific result found, return a Google search link
             fallback_url = f"https://www.google.com/search?q=how+to+cancel+{merchant.replace(' ', '+')}"
-            self.cache[merchant] = fallback_url
+            self._cache_search_result(merchant, fallback_url)
             return fallback_url
             
         except Exception as e:
@@ -113,19 +226,122 @@ class LinkFinder:
         """
         if not merchant:
             return None
+        
+        # Check cache first
+        cache_key = (merchant.strip().upper(), similarity_threshold)
+        if cache_key in self.link_cache:
+            return self.link_cache[cache_key]
             
         # Normalize merchant name
         normalized_merchant = self._normalize_merchant(merchant)
         
-        # Try to find the best match in known merchants
-        best_match, score = process.extractOne(normalized_merchant, self.known_merchants.keys())
-        logger.debug(f"Best match for {merchant}: {best_match} (score: {score})")
+        # An identical known merchant is always the best match, so skip fuzzy scoring for it
+        exact_match = self._exact_keys.get(utils.default_process(normalized_merchant))
+        if exact_match:
+            match = (exact_match, 100.0, None)
+        else:
+            # Try to find the best match in known merchants, ignoring any below the threshold
+            match = process.extractOne(
+                normalized_merchant,
+                self._candidate_merchants(normalized_merchant),
+                scorer=fuzz.WRatio,
+                processor=utils.default_process,
+                score_cutoff=similarity_threshold
+            )
+        
+        if match:
+            best_match, score, _ = match
+            logger.debug(f"Best match for {merchant}: {best_match} (score: {score})")
+            link = self.known_merchants[best_match]
+        else:
+            # If no good match found, try web search
+            link = self._search_google(normalized_merchant)
         
-        if score >= similarity_threshold:
-            return self.known_merchants[best_match]
+        # Don't cache failed searches so they can be retried
+        if link is not None:
+            self.link_cache[cache_key] = link
+        return link
+    
+    def get_cancellation_links(self, merchants: List[str], similarity_threshold: int = 80,
+                               max_search_workers: int = 4) -> Dict[str, Optional[str]]:
+        """
+        Get cancellation links for many merchants at once.
+        
+        Every uncached merchant is scored against the whole known merchant database
+        in a single multi-threaded call, which is much faster than one lookup per
+        merchant. Merchants without a good match fall back to web searches, which
+        run concurrently but still respect the rate limit.
+        
+        Args:
+            merchants (List[str]): Merchant names to look up
+            similarity_threshold (int): Minimum similarity score (0-100) to consider a match
+            max_search_workers (int): Maximum number of web searches waiting on a response at once
+            
+        Returns:
+            Dict[str, Optional[str]]: Mapping of each merchant to its cancellation link,
+                None if no link could be found
+        """
+        links = {}
+        pending = []
+        for merchant in dict.fromkeys(merchants):
+            if not merchant:
+                links[merchant] = None
+                continue
+            cache_key = (merchant.strip().upper(), similarity_threshold)
+            if cache_key in self.link_cache:
+                links[merchant] = self.link_cache[cache_key]
+            else:
+                pending.append(merchant)
+        
+        if not pending:
+            return links
+        
+        normalized = [self._normalize_merchant(merchant) for merchant in pending]
+        if self._merchant_keys:
+            # float64 scores so ties break the same way as get_cancellation_link
+            scores = process.cdist(
+                normalized,
+                self._merchant_keys,
+                scorer=fuzz.WRatio,
+                processor=utils.default_process,
+                dtype=np.float64,
+                score_cutoff=similarity_threshold,
+                workers=-1
+            )
+        
+        unmatched = []
+        for i, (merchant, normalized_merchant) in enumerate(zip(pending, normalized)):
+            link = None
+            # Only consider the same shortlist as get_cancellation_link
+            candidates = self._candidate_indices(normalized_merchant)
+            if candidates:
+                candidate_scores = scores[i, candidates]
+                best = int(candidate_scores.argmax())
+                if candidate_scores[best] >= similarity_threshold:
+                    best_match = self._merchant_keys[candidates[best]]
+                    logger.debug(f"Best match for {merchant}: {best_match} (score: {candidate_scores[best]})")
+                    link = self.known_merchants[best_match]
+            
+            if link is None:
+                # If no good match found, try web search
+                unmatched.append((merchant, normalized_merchant))
+            else:
+                self.link_cache[(merchant.strip().upper(), similarity_threshold)] = link
+                links[merchant] = link
+        
+        if unmatched:
+            queries = list(dict.fromkeys(normalized_merchant for _, normalized_merchant in unmatched))
+            with ThreadPoolExecutor(max_workers=min(max_search_workers, len(queries))) as executor:
+                results = dict(zip(queries, executor.map(self._search_google, queries)))
+            
+            for merchant, normalized_merchant in unmatched:
+                link = results[normalized_merchant]
+                # Don't cache failed searches so they can be retried
+                if link is not None:
+                    self.link_cache[(merchant.strip().upper(), similarity_threshold)] = link
+                links[merchant] = link
         
-        # If no good match found, try web search
-        return self._search_google(normalized_merchant)
+        return links
     
     def add_merchant(self, merchant: str, link: str, save: bool = True) -> None:
         """
@@ -137,6 +353,9 @@ class LinkFinder:
             save (bool): Whether to save changes to the merchants file
         """
         self.known_merchants[merchant] = link
+        self._build_index()
+        # Previously resolved links may now match the new merchant better
+        self.link_cache.clear()
         
         if save:
             merchants_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'known_merchants.json')
@@ -0,0 +1,61 @@
+import re
+from functools import lru_cache
+
+# Pieces of merchant name noise shared by both normalizations below. They are
+# removed in order, one pass each: a single alternation would match whichever
+# piece starts first instead (e.g. " at" in "Cafe at #12" or a state code
+# before " at JFK"), which changes the result for some names
+_SUFFIXES = r'Inc\.|LLC|Ltd\.|Corp\.|#\d+'
+_RE_LOCATION = re.compile(r'\s+(?:in|at)\s+.*$', re.IGNORECASE)
+_RE_STATE_CODE = re.compile(r'\s+[A-Z]{2}(?:\s+|$)')
+
+# Common suffixes (up to the end) removed by normalize_merchant
+_RE_GROUPING_SUFFIX = re.compile(rf'\s*(?:{_SUFFIXES}|Subscription|Mem).*$', re.IGNORECASE)
+
+# Apple Pay prefix and common suffixes (up to the end) removed by clean_merchant_name
+_RE_APLPAY_PREFIX = re.compile(r'^AplPay\s+', re.IGNORECASE)
+_RE_LOOKUP_SUFFIX = re.compile(rf'\s*(?:{_SUFFIXES}).*$', re.IGNORECASE)
+
+# Everything that isn't a letter or digit (str.isalnum), removed from grouping keys
+_RE_NON_ALNUM = re.compile(r'[\W_]+')
+
+@lru_cache(maxsize=8192)
+def normalize_merchant(name: str) -> str:
+    """
+    Normalize a merchant name into a compact key for grouping transactions.
+    Results are cached since statements repeat merchants.
+
+    Args:
+        name (str): Merchant name as it appears on a statement
+
+    Returns:
+        str: Lowercase alphanumeric name without suffixes, locations or state codes
+    """
+    # Remove common suffixes, location information and state codes
+    name = _RE_GROUPING_SUFFIX.sub('', name)
+    name = _RE_LOCATION.sub('', name)
+    name = _RE_STATE_CODE.sub(' ', name)
+    # Remove non-alphanumeric characters and convert to lowercase
+    name = _RE_NON_ALNUM.sub('', name).lower()
+    # Common abbreviations
+    name = name.replace('amzn', 'amazon')
+    name = name.replace('aplpay', '')  # Remove Apple Pay prefix
+    return name
+
+@lru_cache(maxsize=8192)
+def clean_merchant_name(name: str) -> str:
+    """
+    Strip prefixes, suffixes, location information and state codes from a merchant name.
+    Unlike normalize_merchant, case and spacing are kept for fuzzy matching and web searches.
+
+    Args:
+        name (str): Merchant name as it appears on a statement
+
+    Returns:
+        str: Cleaned merchant name
+    """
+    name = _RE_APLPAY_PREFIX.sub('', name)
+    name = _RE_LOOKUP_SUFFIX.sub('', name)
+    name = _RE_LOCATION.sub('', name)
+    name = _RE_STATE_CODE.sub(' ', name)
+    return name.strip()
@@ -1,95 +1,226 @@
 import pdfplumber
-from typing import List, Optional
+import pypdfium2 as pdfium
+from typing import Iterator, List, Optional
 import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from services.analysis_cache import AnalysisCache, DEFAULT_CACHE_DIR
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def parse_pdf(file_path: str) -> List[str]:
+PDF_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, 'pdf')
+
+# PDFium is not thread-safe; serialize its use when PDFs are parsed on a thread pool
+_PDFIUM_LOCK = threading.Lock()
+
+def _extract_lines_pdfium(pdf_path: str) -> Iterator[str]:
+    """Yield text lines from each page with PDFium."""
+    # Only hold the lock while PDFium runs, one page at a time. Lines are
+    # yielded after it is released, so a suspended generator never blocks
+    # other parses.
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        with _PDFIUM_LOCK:
+            page_count = len(pdf)
+        for page_num in range(page_count):
+            with _PDFIUM_LOCK:
+                page = pdf[page_num]
+                textpage = page.get_textpage()
+                text = textpage.get_text_bounded()
+                textpage.close()
+                page.close()
+            
+            line_count = 0
+            for line in text.splitlines():
+                line = line.strip()
+                if line:
+                    line_count += 1
+                    yield line
+            if line_count:
+                logger.debug(f"Extracted {line_count} lines from page {page_num + 1}")
+            else:
+                logger.warning(f"No content extracted from page {page_num + 1}")
+    finally:
+        with _PDFIUM_LOCK:
+            pdf.close()
+
+def _extract_lines_pdfplumber(pdf_path: str) -> Iterator[str]:
+    """Yield table rows and text lines from each page with pdfplumber."""
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num, page in enumerate(pdf.pages, 1):
+            logger.debug(f"Processing page {page_num}")
+            
+            # First try to extract tables
+            tables = page.extract_tables()
+            if tables:
+                logger.debug(f"Found {len(tables)} tables on page {page_num}")
+                for table in tables:
+                    for row in table:
+                        # Convert all cells to strings and filter out None/empty cells
+                        row_text = ' '.join(str(cell).strip() for cell in row if cell is not None and str(cell).strip())
+                        if row_text:
+                            yield row_text
+                            logger.debug(f"Table row: {row_text}")
+            
+            # Then extract regular text
+            text = page.extract_text()
+            if text:
+                logger.debug(f"Extracted text from page {page_num}")
+                # Split text into lines and filter out empty lines
+                for line in text.split('\n'):
+                    line = line.strip()
+                    if line:
+                        yield line
+            else:
+                # If regular text extraction fails, try extracting words directly
+                words = page.extract_words()
+                if words:
+                    logger.debug(f"Extracted {len(words)} words from page {page_num}")
+                    current_line = []
+                    current_y = None
+                    
+                    for word in words:
+                        # If this is a new line (based on y-position)
+                        if current_y is None or abs(word['top'] - current_y) > 3:  # 3 pixels tolerance
+                            if current_line:
+                                yield ' '.join(current_line)
+                            current_line = [word['text']]
+                            current_y = word['top']
+                        else:
+                            current_line.append(word['text'])
+                    
+                    # Don't forget the last line
+                    if current_line:
+                        yield ' '.join(current_line)
+                else:
+                    logger.warning(f"No content extracted from page {page_num}")
+
+def iter_pdf_lines(file_path: str, extract_tables: bool = False) -> Iterator[str]:
     """
-    Parse a PDF file and extract text from each page, including tables.
+    Yield the distinct text lines of a PDF file as they are extracted.
+    
+    Unlike parse_pdf, lines are never collected into a list, so they can be fed
+    straight into extract_transactions one page at a time.
     
     Args:
         file_path (str): Path to the PDF file
+        extract_tables (bool): Also extract table rows (slower, uses pdfplumber)
         
-    Returns:
-        List[str]: List of text lines from the PDF
+    Yields:
+        str: Text lines from the PDF, skipping repeats
     """
-    lines = []
+    seen = set()  # Table rows and page text often repeat the same content
     try:
-        with pdfplumber.open(file_path) as pdf:
-            logger.info(f"Processing PDF: {file_path}")
-            for page_num, page in enumerate(pdf.pages, 1):
-                logger.debug(f"Processing page {page_num}")
-                
-                # First try to extract tables
-                tables = page.extract_tables()
-                if tables:
-                    logger.debug(f"Found {len(tables)} tables on page {page_num}")
-                    for table in tables:
-                        for row in table:
-                            # Convert all cells to strings and filter out None/empty cells
-                            row_text = ' '.join(str(cell).strip() for cell in row if cell is not None and str(cell).strip())
-                            if row_text:
-                                lines.append(row_text)
-                                logger.debug(f"Table row: {row_text}")
-                
-                # Then extract regular text
-                text = page.extract_text()
-                if text:
-                    logger.debug(f"Extracted text from page {page_num}")
-                    # Split text into lines and filter out empty lines
-                    page_lines = [line.strip() for line in text.split('\n') if line.strip()]
-                    lines.extend(page_lines)
-                else:
-                    # If regular text extraction fails, try extracting words directly
-                    words = page.extract_words()
-                    if words:
-                        logger.debug(f"Extracted {len(words)} words from page {page_num}")
-                        current_line = []
-                        current_y = None
-                        
-                        for word in words:
-                            # If this is a new line (based on y-position)
-                            if current_y is None or abs(word['top'] - current_y) > 3:  # 3 pixels tolerance
-                                if current_line:
-                                    lines.append(' '.join(current_line))
-                                current_line = [word['text']]
-                                current_y = word['top']
-                            else:
-                                current_line.append(word['text'])
-                        
-                        # Don't forget the last line
-                        if current_line:
-                            lines.append(' '.join(current_line))
-                    else:
-                        logger.warning(f"No content extracted from page {page_num}")
+        logger.info(f"Processing PDF: {file_path}")
+        extract_lines = _extract_lines_pdfplumber if extract_tables else _extract_lines_pdfium
+        for line in extract_lines(file_path):
+            if line not in seen:
+                seen.add(line)
+                yield line
     except Exception as e:
         logger.error(f"Error processing PDF {file_path}: {str(e)}")
         raise
+
+def parse_pdf(file_path: str, extract_tables: bool = False) -> List[str]:
+    """
+    Parse a PDF file and extract text from each page.
+    
+    Text is extracted with PDFium, which is much faster than pdfplumber.
+    pdfplumber is only used when table extraction is requested.
     
-    # Remove duplicate lines and sort by any date-like patterns
-    unique_lines = list(dict.fromkeys(lines))
-    return unique_lines
+    Args:
+        file_path (str): Path to the PDF file
+        extract_tables (bool): Also extract table rows (slower, uses pdfplumber)
+        
+    Returns:
+        List[str]: List of text lines from the PDF
+    """
+    return list(iter_pdf_lines(file_path, extract_tables))
 
-def parse_pdf_directory(directory_path: str) -> dict[str, List[str]]:
+def parse_pdf_cached(file_path: str, extract_tables: bool = False, cache_dir: str = None) -> List[str]:
+    """
+    Parse a PDF file, reusing the lines from a previous parse if the file hasn't changed.
+    
+    Cached lines are keyed by the file's path, modification time and size.
+    
+    Args:
+        file_path (str): Path to the PDF file
+        extract_tables (bool): Also extract table rows (slower, uses pdfplumber)
+        cache_dir (str, optional): Directory to store cached lines in, defaults to PDF_CACHE_DIR
+        
+    Returns:
+        List[str]: List of text lines from the PDF
+    """
+    cache = AnalysisCache(cache_dir or PDF_CACHE_DIR)
+    key = cache.make_key([file_path])
+    if extract_tables:
+        key = f"{key}-tables"
+    
+    lines = cache.load(key)
+    if lines is None:
+        lines = parse_pdf(file_path, extract_tables)
+        cache.save(key, lines)
+    return lines
+
+def parse_pdf_directory(directory_path: str, use_processes: bool = True,
+                        max_workers: Optional[int] = None,
+                        extract_tables: bool = False,
+                        use_cache: bool = False,
+                        cache_dir: str = None) -> dict[str, List[str]]:
     """
     Parse all PDF files in a directory.
     
+    Files are parsed in parallel, one job per file. Results keep directory
+    listing order regardless of which worker finishes first. With a single
+    file or worker, files are parsed in this process without a pool.
+    
     Args:
         directory_path (str): Path to directory containing PDF files
+        use_processes (bool): Use a process pool (default). Set to False to
+            fall back to a thread pool, e.g. on Windows or low-memory machines
+        max_workers (int, optional): Pool size, defaults to os.cpu_count()
+        extract_tables (bool): Also extract table rows (slower, uses pdfplumber)
+        use_cache (bool): Reuse lines from previous parses of unchanged files,
+            see parse_pdf_cached
+        cache_dir (str, optional): Directory to store cached lines in, defaults to PDF_CACHE_DIR
         
     Returns:
         dict[str, List[str]]: Dictionary mapping filenames to their extracted lines
     """
-    import os
-    
     results = {}
-    for filename in os.listdir(directory_path):
-        if filename.lower().endswith('.pdf'):
-            file_path = os.path.join(directory_path, filename)
+    parse = partial(parse_pdf_cached, cache_dir=cache_dir) if use_cache else parse_pdf
+    
+    filenames = [filename for filename in os.listdir(directory_path) if filename.lower().endswith('.pdf')]
+    if not filenames:
+        return results
+    
+    max_workers = min(max_workers or os.cpu_count() or 1, len(filenames))
+    if max_workers == 1:
+        # A pool can't parallelize a single job; skip the cost of starting workers
+        for filename in filenames:
+            try:
+                results[filename] = parse(os.path.join(directory_path, filename), extract_tables)
+            except Exception as e:
+                logger.error(f"Failed to process {filename}: {str(e)}")
+                results[filename] = []
+        return results
+    
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    
+    with executor_class(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(parse, os.path.join(directory_path, filename), extract_tables): filename
+            for filename in filenames
+        }
+        # Collect in listing order so the result doesn't depend on worker timing
+        for future, filename in futures.items():
             try:
-                results[filename] = parse_pdf(file_path)
+                results[filename] = future.result()
             except Exception as e:
                 logger.error(f"Failed to process {filename}: {str(e)}")
                 results[filename] = []
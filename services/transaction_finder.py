@@ -1,86 +1,117 @@
 import re
-from typing import List, Optional
+from typing import Iterable, List, Optional
 import logging
 from datetime import datetime
-from thefuzz import fuzz
+from operator import attrgetter
+from statistics import fmean
+import numpy as np
+from rapidfuzz import fuzz, process
+from rapidfuzz.distance import Levenshtein
 from models.transaction import Transaction
+from services.merchant_normalize import normalize_merchant
 
 logging.basicConfig(level=logging.DEBUG)  # Set to DEBUG level
 logger = logging.getLogger(__name__)
 
-def extract_transactions(lines: List[str]) -> List[Transaction]:
+# Transaction line: a MM/DD/YY date and a USD amount. Each part is a lookahead
+# from the start of the line, so each finds its leftmost match independently:
+# the first date, then the first foreign currency amount followed by its USD
+# amount, or failing that the first USD amount.
+_RE_TRANSACTION_LINE = re.compile(
+    r'(?=.*?(?P<date>\d{2}/\d{2}/\d{2}))'
+    r'(?:(?=.*?(?P<foreign>\d+\.\d{2})\s+\$(?P<foreign_usd>[0-9,]+\.\d{2}))'
+    r'|(?=.*?\$(?P<usd>[0-9,]+\.\d{2})))'
+)
+
+# Runs of whitespace inside an extracted merchant name
+_RE_WHITESPACE_RUN = re.compile(r'\s+')
+
+# Lines containing any of these are statement metadata, not transactions
+_SKIP_KEYWORDS = [
+    'and/or Cash',
+    'Advance',
+    'Document Type',
+    'Ticket Number',
+    'From:',
+    'To:',
+    'Passenger Name',
+    'MERCHANDISE',
+    'RESTAURANT',
+    'FAST FOOD',
+    'GROCERY STORE'
+]
+# One alternation scanned in a single pass by the C regex engine, which skips
+# positions that can't start any keyword, so per-line cost barely grows with the list
+_RE_SKIP_LINE = re.compile('|'.join(map(re.escape, _SKIP_KEYWORDS)))
+
+# Patterns used by are_merchants_similar, applied to lowercased names
+_RE_SIMILAR_APLPAY = re.compile(r'aplpay\s+')
+_RE_SIMILAR_SUFFIX = re.compile(r'\s+(?:limited|ltd|llc|inc)\b')
+_RE_SIMILAR_PUNCTUATION = re.compile(r'[^\w\s]')
+_RE_SIMILAR_WHITESPACE = re.compile(r'\s+')
+
+def _parse_short_date(date_str: str) -> datetime:
+    """
+    Parse a MM/DD/YY date string by slicing, which is much faster than strptime.
+    Two-digit years map to 1969-2068, the same as strptime's %y.
+    """
+    if len(date_str) != 8 or date_str[2] != '/' or date_str[5] != '/':
+        return datetime.strptime(date_str, '%m/%d/%y')
+    year = int(date_str[6:8])
+    year += 2000 if year < 69 else 1900
+    return datetime(year, int(date_str[0:2]), int(date_str[3:5]))
+
+def extract_transactions(lines: Iterable[str], credit_card: str = 'Amex') -> List[Transaction]:
     """
     Extract transactions from text lines using pattern matching.
     Handles AmEx's multi-line transaction format.
     
     Args:
-        lines (List[str]): Lines of text from a bank statement
+        lines (Iterable[str]): Lines of text from a bank statement, e.g. a list or
+            the generator returned by pdf_parser.iter_pdf_lines
+        credit_card (str): Name of the credit card the statement belongs to
         
     Returns:
         List[Transaction]: List of extracted transactions
     """
     transactions = []
     
-    # Regular expressions for different transaction formats
-    date_pattern = r'(\d{2}/\d{2}/\d{2})'
-    amount_pattern = r'\$([0-9,]+\.\d{2})'
-    foreign_amount_pattern = r'(\d+\.\d{2})\s+\$([0-9,]+\.\d{2})'
-    
-    skip_keywords = [
-        'and/or Cash',
-        'Advance',
-        'Document Type',
-        'Ticket Number',
-        'From:',
-        'To:',
-        'Passenger Name',
-        'MERCHANDISE',
-        'RESTAURANT',
-        'FAST FOOD',
-        'GROCERY STORE'
-    ]
-
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
+    for line in lines:
+        # Every transaction line has a USD amount; this substring check is far
+        # cheaper than either regex and rules out most statement text
+        if '$' not in line:
+            continue
+        line = line.strip()
         
         # Skip lines with metadata
-        if any(keyword in line for keyword in skip_keywords):
-            i += 1
+        if _RE_SKIP_LINE.search(line):
             continue
             
-        # Try to match transaction patterns
-        date_match = re.search(date_pattern, line)
-        if date_match:
+        # Match date and amounts in a single scan of the line
+        match = _RE_TRANSACTION_LINE.match(line)
+        if match:
             try:
                 # Extract date
-                date_str = date_match.group(1)
-                date = datetime.strptime(date_str, '%m/%d/%y')
+                date_str = match.group('date')
+                date = _parse_short_date(date_str)
                 
                 # Extract merchant name - everything between the date and amount
-                # First try foreign currency format
-                foreign_amount_match = re.search(foreign_amount_pattern, line)
-                if foreign_amount_match:
+                foreign_amount = match.group('foreign')
+                if foreign_amount:
                     # For foreign transactions, get everything between date and foreign amount
-                    merchant = line[date_match.end():line.rfind(foreign_amount_match.group(1))].strip()
-                    amount = float(foreign_amount_match.group(2).replace(',', ''))
+                    merchant = line[match.end('date'):line.rfind(foreign_amount)].strip()
+                    amount = float(match.group('foreign_usd').replace(',', ''))
                 else:
                     # For USD transactions, get everything between date and USD amount
-                    amount_match = re.search(amount_pattern, line)
-                    if amount_match:
-                        merchant = line[date_match.end():line.rfind('$')].strip()
-                        amount = float(amount_match.group(1).replace(',', ''))
-                    else:
-                        i += 1
-                        continue
+                    merchant = line[match.end('date'):line.rfind('$')].strip()
+                    amount = float(match.group('usd').replace(',', ''))
                 
                 # Clean up merchant name
-                merchant = re.sub(r'\s+', ' ', merchant)  # Replace multiple spaces with single space
+                merchant = _RE_WHITESPACE_RUN.sub(' ', merchant)  # Replace multiple spaces with single space
                 merchant = merchant.strip()
                 
                 # Skip if no merchant name found
                 if not merchant:
-                    i += 1
                     continue
                     
                 logger.debug(f"Found transaction: Date={date}, Merchant={merchant}, Amount=${amount}")
@@ -88,15 +119,14 @@ def extract_transactions(lines: List[str]) -> List[Transaction]:
                 transaction = Transaction(
                     date=date,
                     merchant=merchant,
-                    amount=amount
+                    amount=amount,
+                    credit_card=credit_card
                 )
                 transactions.append(transaction)
                 
             except Exception as e:
                 logger.error(f"Error processing line: {line}")
                 logger.error(f"Error details: {str(e)}")
-                
-        i += 1
     
     return transactions
 
@@ -113,41 +143,57 @@ def group_similar_transactions(transactions: List[Transaction], similarity_thres
     """
     groups: dict[str, List[Transaction]] = {}
     
-    def normalize_merchant(name: str) -> str:
-        """Normalize merchant name for comparison."""
-        # Remove common suffixes and special characters
-        name = re.sub(r'\s*(Inc\.|LLC|Ltd\.|Corp\.|#\d+|Subscription|Mem).*$', '', name, flags=re.IGNORECASE)
-        # Remove location information
-        name = re.sub(r'\s+(?:in|at)\s+.*$', '', name, flags=re.IGNORECASE)
-        name = re.sub(r'\s+[A-Z]{2}(?:\s+|$)', ' ', name)  # Remove state codes
-        # Convert to lowercase and remove non-alphanumeric characters
-        name = ''.join(c.lower() for c in name if c.isalnum())
-        # Common abbreviations
-        name = name.replace('amzn', 'amazon')
-        name = name.replace('aplpay', '')  # Remove Apple Pay prefix
-        return name
+    # Score every distinct normalized name against every other one in a single C++ call.
+    # Merchants that normalize to the same name always share a group, so the matrix
+    # only needs one row per normalized name. The first merchant seen with each name
+    # is kept so groups stay keyed by an original merchant string.
+    merchants = dict.fromkeys(t.merchant for t in transactions)
+    normalized_of = {merchant: normalize_merchant(merchant) for merchant in merchants}
+    first_merchant: dict[str, str] = {}
+    for merchant, name in normalized_of.items():
+        first_merchant.setdefault(name, merchant)
+    names = list(first_merchant)
+    # score_cutoff lets rapidfuzz skip any pair whose length difference alone rules
+    # out the threshold before running the full comparison. There is no first-character
+    # prefilter: names like "theathletic" and "athletic" must still be compared.
+    # The cutoff applies to unrounded scores, so it is lowered by half a point and
+    # scores are rounded afterwards: like thefuzz's integer scores, a pair scoring
+    # 69.57 counts as 70. np.rint rounds halves to even, as Python's round() does.
+    scores = process.cdist(
+        names,
+        names,
+        scorer=fuzz.ratio,
+        dtype=np.float32,
+        score_cutoff=similarity_threshold - 0.5,
+        workers=-1
+    )
+    np.rint(scores, out=scores)
     
-    for transaction in transactions:
-        normalized = normalize_merchant(transaction.merchant)
-        matched = False
-        logger.debug(f"Normalized merchant name: {transaction.merchant} -> {normalized}")
-        
-        # Try to find a matching group
-        for existing_merchant in list(groups.keys()):  # Create a copy of keys to avoid runtime modification issues
-            existing_normalized = normalize_merchant(existing_merchant)
-            similarity = fuzz.ratio(normalized, existing_normalized)
-            logger.debug(f"Comparing {normalized} with {existing_normalized}: {similarity}%")
-            
-            if similarity >= similarity_threshold:
-                groups[existing_merchant].append(transaction)
-                matched = True
-                logger.debug(f"Matched {transaction.merchant} to existing group {existing_merchant}")
-                break
+    # Assign each name, in order of first appearance, to the most similar
+    # existing group or start a new group with it. This stays greedy rather than
+    # taking the transitive closure of all matches, which would chain unrelated
+    # merchants together through intermediate names.
+    group_indices: List[int] = []
+    name_groups: dict[str, str] = {}
+    for i, name in enumerate(names):
+        merchant = first_merchant[name]
+        if group_indices:
+            candidate_scores = scores[i, group_indices]
+            best = int(candidate_scores.argmax())
+            if candidate_scores[best] >= similarity_threshold:
+                existing_merchant = first_merchant[names[group_indices[best]]]
+                name_groups[name] = existing_merchant
+                logger.debug(f"Matched {merchant} to existing group {existing_merchant} ({candidate_scores[best]:.0f}%)")
+                continue
         
         # If no match found, create a new group
-        if not matched:
-            groups[transaction.merchant] = [transaction]
-            logger.debug(f"Created new group for {transaction.merchant}")
+        group_indices.append(i)
+        name_groups[name] = merchant
+        logger.debug(f"Created new group for {merchant}")
+    
+    merchant_groups = {merchant: name_groups[name] for merchant, name in normalized_of.items()}
+    for transaction in transactions:
+        groups.setdefault(merchant_groups[transaction.merchant], []).append(transaction)
     
     return groups
 
@@ -169,62 +215,93 @@ def identify_recurring_transactions(grouped_transactions: dict[str, List[Transac
     """
     recurring = {}
     
+    # Group each merchant's transactions by similar amounts. Each transaction
+    # joins the first earlier base amount it is within the threshold of, so
+    # only the group bases are compared against (O(N*G), not O(N^2)). The
+    # groups of all merchants are numbered in one sequence and their dates and
+    # amounts collected into flat arrays, so the interval checks and averages
+    # below run once for every merchant instead of once per group.
+    group_merchants = []  # Merchant of each amount group
+    labels = []  # Amount group of each collected transaction
+    ordinals = []
+    amounts = []
+    collected = []
     for merchant, transactions in grouped_transactions.items():
         if len(transactions) < min_occurrences:
             continue
-            
-        # Sort transactions by date
-        sorted_transactions = sorted(transactions, key=lambda t: t.date)
         
-        # Group transactions by similar amounts
-        amount_groups = {}
-        for trans in sorted_transactions:
-            if trans.amount == 0:  # Skip zero-amount transactions
+        bases = []  # (base amount, group) pairs in creation order
+        for trans in sorted(transactions, key=lambda t: t.date):
+            amount = trans.amount
+            if amount == 0:  # Skip zero-amount transactions
                 continue
-                
-            matched = False
-            for base_amount in amount_groups.keys():
-                # Calculate percentage difference
-                try:
-                    diff = abs(trans.amount - base_amount) / base_amount
-                    if diff <= amount_variance_threshold:
-                        amount_groups[base_amount].append(trans)
-                        matched = True
-                        break
-                except ZeroDivisionError:
-                    continue
-            if not matched:
-                amount_groups[trans.amount] = [trans]
-        
-        # Find groups with regular intervals and consistent amounts
-        for amount, similar_transactions in amount_groups.items():
-            if len(similar_transactions) >= min_occurrences:
-                # Check for regular intervals
-                intervals = []
-                for i in range(1, len(similar_transactions)):
-                    days = (similar_transactions[i].date - similar_transactions[i-1].date).days
-                    if days <= max_days_between:
-                        intervals.append(days)
-                
-                # If we have consistent intervals and amounts, consider it a subscription
-                if intervals and (
-                    len(intervals) >= min_occurrences - 1  # At least min_occurrences-1 intervals
-                    and max(intervals) <= max_days_between  # All intervals within range
-                ):
-                    try:
-                        # Calculate average amount, skipping zero amounts
-                        valid_amounts = [t.amount for t in similar_transactions if t.amount != 0]
-                        if valid_amounts:  # Only proceed if we have valid amounts
-                            avg_amount = sum(valid_amounts) / len(valid_amounts)
-                            if merchant not in recurring:
-                                recurring[merchant] = similar_transactions
-                                logger.info(f"Identified subscription for {merchant} (${avg_amount:.2f}/period)")
-                    except ZeroDivisionError:
-                        logger.warning(f"Skipping {merchant} due to invalid amounts")
-                        continue
-                    
+            for base_amount, group in bases:
+                if abs(amount - base_amount) / base_amount <= amount_variance_threshold:
+                    break
+            else:
+                group = len(group_merchants)
+                group_merchants.append(merchant)
+                bases.append((amount, group))
+            labels.append(group)
+            ordinals.append(trans.date.toordinal())
+            amounts.append(amount)
+            collected.append(trans)
+    
+    if not collected:
+        return recurring
+    
+    # Reorder so each group is a contiguous run, in date order within the run
+    order = np.argsort(np.array(labels, dtype=np.intp), kind='stable')
+    sizes = np.bincount(labels, minlength=len(group_merchants))
+    starts = np.zeros_like(sizes)
+    np.cumsum(sizes[:-1], out=starts[1:])
+    
+    # Count the intervals within range in each group; the difference across
+    # the boundary between two groups is masked out
+    days = np.diff(np.array(ordinals, dtype=np.int64)[order])
+    in_range = np.append(days <= max_days_between, False)
+    in_range[starts[1:] - 1] = False
+    interval_counts = np.add.reduceat(in_range, starts)
+    average_amounts = np.add.reduceat(np.array(amounts, dtype=np.float64)[order], starts) / sizes
+    
+    # If we have consistent intervals and amounts, consider it a subscription:
+    # at least min_occurrences-1 intervals within range
+    qualifies = (sizes >= min_occurrences) & (interval_counts > 0) & (interval_counts >= min_occurrences - 1)
+    
+    # Keep the first qualifying group of each merchant
+    for group in np.flatnonzero(qualifies).tolist():
+        merchant = group_merchants[group]
+        if merchant in recurring:
+            continue
+        start = starts[group]
+        similar_transactions = [collected[i] for i in order[start:start + sizes[group]].tolist()]
+        recurring[merchant] = similar_transactions
+        logger.info(f"Identified subscription for {merchant} (${average_amounts[group]:.2f}/period)")
+    
     return recurring
 
+def summarize_recurring_transactions(recurring: dict[str, List[Transaction]]) -> dict[str, tuple[float, str, int]]:
+    """
+    Summarize each group of recurring transactions.
+    
+    Args:
+        recurring (dict[str, List[Transaction]]): Recurring transactions by merchant
+        
+    Returns:
+        dict[str, tuple[float, str, int]]: Mapping of merchant to
+            (average amount, credit card of the most recent transaction, number of transactions)
+    """
+    summaries = {}
+    
+    for merchant, transactions in recurring.items():
+        if not transactions:
+            continue
+        
+        latest = max(transactions, key=attrgetter('date'))
+        summaries[merchant] = (fmean(t.amount for t in transactions), latest.credit_card, len(transactions))
+    
+    return summaries
+
 def find_recurring_transactions(transactions, similarity_threshold=0.85):
     # Group transactions by merchant similarity
     merchant_groups = {}
@@ -254,27 +331,20 @@ def are_merchants_similar(merchant1, merchant2, threshold=0.85):
     # Convert to lowercase and remove common variations
     def normalize(name):
         name = name.lower()
-        name = re.sub(r'aplpay\s+', '', name)  # Remove AplPay prefix
-        name = re.sub(r'\s+limited\b', '', name)  # Remove Limited suffix
-        name = re.sub(r'\s+ltd\b', '', name)  # Remove Ltd suffix
-        name = re.sub(r'\s+llc\b', '', name)  # Remove LLC suffix
-        name = re.sub(r'\s+inc\b', '', name)  # Remove Inc suffix
-        name = re.sub(r'[^\w\s]', '', name)  # Remove punctuation
-        name = re.sub(r'\s+', '', name)  # Remove all whitespace
+        name = _RE_SIMILAR_APLPAY.sub('', name)  # Remove AplPay prefix
+        name = _RE_SIMILAR_SUFFIX.sub('', name)  # Remove Limited/Ltd/LLC/Inc suffixes
+        name = _RE_SIMILAR_PUNCTUATION.sub('', name)  # Remove punctuation
+        name = _RE_SIMILAR_WHITESPACE.sub('', name)  # Remove all whitespace
         return name
     
     norm1 = normalize(merchant1)
     norm2 = normalize(merchant2)
     
-    # Calculate similarity ratio
-    longer = max(len(norm1), len(norm2))
-    if longer == 0:
+    if not norm1 and not norm2:
         return False
-        
-    distance = sum(a != b for a, b in zip(norm1.ljust(longer), norm2.ljust(longer)))
-    similarity = 1 - (distance / longer)
     
-    return similarity >= threshold
+    # Edit-distance similarity (0-1), so insertions and deletions only cost one character
+    return Levenshtein.normalized_similarity(norm1, norm2) >= threshold
 
 if __name__ == "__main__":
     # Example usage
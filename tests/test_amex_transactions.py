@@ -1,15 +1,17 @@
 import sys
 import os
+import tempfile
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from models.transaction import format_mdy
 from services.transaction_finder import extract_transactions, find_recurring_transactions
-from services.pdf_parser import parse_pdf
+from services.pdf_parser import parse_pdf_cached
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def test_amex_transactions():
+def test_amex_transactions(tmp_path):
     # Get list of PDF files from sample_pdfs directory
     pdf_dir = os.path.join('data', 'sample_pdfs')
     logger.debug(f"Looking for PDFs in {pdf_dir}")
@@ -34,7 +36,7 @@ def test_amex_transactions():
         # Parse PDF content
         pdf_path = os.path.join(pdf_dir, pdf_file)
         logger.debug(f"Reading PDF from {pdf_path}")
-        content = parse_pdf(pdf_path)
+        content = parse_pdf_cached(pdf_path, cache_dir=str(tmp_path))
         
         # Log first few lines of content for debugging
         logger.debug("First 10 lines of content:")
@@ -49,7 +51,7 @@ def test_amex_transactions():
         if transactions:
             logger.info("\nSample transactions:")
             for t in transactions[:5]:
-                logger.info(f"{t.date.strftime('%m/%d/%Y')} | {t.merchant} | ${t.amount:.2f}")
+                logger.info(f"{format_mdy(t.date)} | {t.merchant} | ${t.amount:.2f}")
         else:
             logger.warning("No transactions found in this PDF!")
         
@@ -71,7 +73,8 @@ def test_amex_transactions():
         logger.info(f"Average amount: ${avg:.2f}")
         logger.info("Transactions:")
         for t in sorted(transactions, key=lambda x: x.date):
-            logger.info(f"  {t.date.strftime('%m/%d/%Y')}: ${t.amount:.2f}")
+            logger.info(f"  {format_mdy(t.date)}: ${t.amount:.2f}")
 
 if __name__ == "__main__":
-    test_amex_transactions() 
\ No newline at end of file
+    with tempfile.TemporaryDirectory() as cache_dir:
+        test_amex_transactions(cache_dir) 
\ No newline at end of file
@@ -0,0 +1,74 @@
+import sys
+import os
+import pytest
+import tempfile
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services import analysis_cache
+from services.analysis_cache import AnalysisCache
+from models.transaction import Transaction
+
+@pytest.fixture
+def temp_dir():
+    """Fixture to create a temporary directory for test files."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield tmpdirname
+
+def create_statement(path, content="Date,Description,Amount\n"):
+    """Helper function to create a statement file."""
+    with open(path, 'w') as f:
+        f.write(content)
+
+def test_save_and_load(temp_dir):
+    """Test that saved results are loaded back under the same key."""
+    cache = AnalysisCache(os.path.join(temp_dir, 'cache'))
+    statement = os.path.join(temp_dir, 'Amex.csv')
+    create_statement(statement)
+    
+    results = {
+        'Netflix': [Transaction(date=datetime(2024, 1, 15), merchant='Netflix', amount=19.99, credit_card='Amex')]
+    }
+    key = cache.make_key([statement])
+    assert cache.load(key) is None
+    
+    cache.save(key, results)
+    assert cache.load(key) == results
+
+def test_key_changes_with_files(temp_dir):
+    """Test that modifying or adding statement files changes the key."""
+    cache = AnalysisCache(os.path.join(temp_dir, 'cache'))
+    statement = os.path.join(temp_dir, 'Amex.csv')
+    create_statement(statement)
+    key = cache.make_key([statement])
+    
+    assert cache.make_key([statement]) == key
+    
+    create_statement(statement, "Date,Description,Amount\n01/15/2024,Netflix,19.99\n")
+    modified_key = cache.make_key([statement])
+    assert modified_key != key
+    
+    other = os.path.join(temp_dir, 'Chase.csv')
+    create_statement(other)
+    assert cache.make_key([statement, other]) != modified_key
+
+def test_key_changes_with_version(temp_dir, monkeypatch):
+    """Test that bumping the cache version invalidates existing keys."""
+    cache = AnalysisCache(os.path.join(temp_dir, 'cache'))
+    statement = os.path.join(temp_dir, 'Amex.csv')
+    create_statement(statement)
+    key = cache.make_key([statement])
+    
+    monkeypatch.setattr(analysis_cache, 'CACHE_VERSION', analysis_cache.CACHE_VERSION + 1)
+    assert cache.make_key([statement]) != key
+
+def test_corrupt_cache_file(temp_dir):
+    """Test that unreadable cache files are treated as a miss."""
+    cache = AnalysisCache(temp_dir)
+    with open(os.path.join(temp_dir, 'badkey.pkl'), 'wb') as f:
+        f.write(b'not a pickle')
+    
+    assert cache.load('badkey') is None
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -4,15 +4,20 @@ import pytest
 from datetime import datetime
 import tempfile
 import csv
+import io
+from unittest.mock import patch
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services import csv_parser
 from services.csv_parser import CSVParser
 
 def create_test_csv(filename, format_type, rows):
     """Helper function to create test CSV files."""
+    # Format all rows in memory and write the file in one call
+    buffer = io.StringIO(newline='')
+    csv.writer(buffer).writerows(rows)
     with open(filename, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerows(rows)
+        f.write(buffer.getvalue())
 
 @pytest.fixture
 def temp_dir():
@@ -61,6 +66,21 @@ def test_amex_transaction_parsing(temp_dir):
     assert transactions[1].merchant == 'Amazon Prime'
     assert transactions[1].amount == 14.99
 
+def test_format_detected_once_per_file(temp_dir):
+    """Test that the header is read and the format detected once per file, not per row."""
+    test_data = [['Date', 'Description', 'Amount']]
+    test_data += [[f'01/{day:02d}/2024', f'Merchant {day}', '9.99'] for day in range(1, 29)]
+    
+    test_file = os.path.join(temp_dir, 'Amex.csv')
+    create_test_csv(test_file, 'AMEX', test_data)
+    
+    parser = CSVParser()
+    with patch.object(parser, '_detect_format', wraps=parser._detect_format) as mock_detect:
+        transactions = parser.parse_csv(test_file)
+    
+    assert len(transactions) == 28
+    mock_detect.assert_called_once_with(['Date', 'Description', 'Amount'])
+
 def test_chase_transaction_parsing(temp_dir):
     """Test parsing Chase format transactions."""
     test_data = [
@@ -84,6 +104,28 @@ def test_chase_transaction_parsing(temp_dir):
     assert transactions[1].merchant == 'Spotify Premium'
     assert transactions[1].amount == 12.99
 
+def test_skipped_rows_are_not_parsed(temp_dir):
+    """Test that skipped rows are dropped before their dates and amounts are parsed."""
+    parser = CSVParser()
+    
+    amex_file = os.path.join(temp_dir, 'Amex.csv')
+    create_test_csv(amex_file, 'AMEX', [
+        ['Date', 'Description', 'Amount'],
+        ['not a date', 'PAYMENT RECEIVED - THANK YOU', 'not an amount'],
+        ['01/15/2024', 'Netflix', '19.99']
+    ])
+    chase_file = os.path.join(temp_dir, 'Chase.csv')
+    create_test_csv(chase_file, 'CHASE', [
+        ['Status', 'Date', 'Description', 'Debit', 'Credit'],
+        ['PENDING', 'not a date', 'AMAZON.COM', 'not an amount', ''],
+        ['CLEARED', '01/15/2024', 'NETFLIX.COM', '19.99', '']
+    ])
+    
+    with patch('services.csv_parser.logger') as mock_logger:
+        assert len(parser.parse_csv(amex_file)) == 1
+        assert len(parser.parse_csv(chase_file)) == 1
+    mock_logger.warning.assert_not_called()
+
 def test_directory_parsing(temp_dir):
     """Test parsing multiple CSV files in a directory."""
     # Create AMEX test file
@@ -109,6 +151,49 @@ def test_directory_parsing(temp_dir):
     assert any(t.merchant == 'Netflix' and t.credit_card == 'Amex' for t in transactions)
     assert any(t.merchant == 'Spotify' and t.credit_card == 'Chase' for t in transactions)
 
+def test_directory_parsing_with_threads(temp_dir, monkeypatch):
+    """Test parsing a directory with the thread pool fallback."""
+    monkeypatch.setattr(csv_parser, 'PARALLEL_MIN_BYTES', 0)
+    for i in range(3):
+        amex_data = [
+            ['Date', 'Description', 'Amount'],
+            [f'01/1{i}/2024', f'Merchant {i}', '9.99']
+        ]
+        create_test_csv(os.path.join(temp_dir, f'Card {i}.csv'), 'AMEX', amex_data)
+    
+    parser = CSVParser()
+    transactions = parser.parse_directory(temp_dir, use_processes=False)
+    
+    assert len(transactions) == 3
+    assert {t.credit_card for t in transactions} == {'Card 0', 'Card 1', 'Card 2'}
+
+def test_small_directory_parsed_in_process(temp_dir):
+    """Test that small directories are parsed without starting a worker pool."""
+    for i in range(3):
+        amex_data = [
+            ['Date', 'Description', 'Amount'],
+            [f'01/1{i}/2024', f'Merchant {i}', '9.99']
+        ]
+        create_test_csv(os.path.join(temp_dir, f'Card {i}.csv'), 'AMEX', amex_data)
+    
+    parser = CSVParser()
+    with patch.object(csv_parser, 'ProcessPoolExecutor') as pool:
+        transactions = parser.parse_directory(temp_dir)
+    
+    pool.assert_not_called()
+    expected = [os.path.splitext(os.path.basename(p))[0] for p in parser.list_csv_files(temp_dir)]
+    assert [t.credit_card for t in transactions] == expected
+
+def test_list_csv_files(temp_dir):
+    """Test that only CSV files are listed, regardless of extension case."""
+    for name in ['Amex.csv', 'Chase.CSV', 'notes.txt']:
+        open(os.path.join(temp_dir, name), 'w').close()
+    os.mkdir(os.path.join(temp_dir, 'archive.csv'))
+    
+    parser = CSVParser()
+    names = sorted(os.path.basename(p) for p in parser.list_csv_files(temp_dir))
+    assert names == ['Amex.csv', 'Chase.CSV']
+
 def test_error_handling(temp_dir):
     """Test error handling for malformed CSV files."""
     # Create malformed CSV file
@@ -0,0 +1,44 @@
+import sys
+import os
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.merchant_normalize import normalize_merchant, clean_merchant_name
+
+def test_normalize_merchant():
+    """Test that grouping keys drop noise, case and punctuation."""
+    assert normalize_merchant("Netflix #123") == "netflix"
+    assert normalize_merchant("NETFLIX SUBSCRIPTION") == "netflix"
+    assert normalize_merchant("AMZN Prime") == "amazonprime"
+    assert normalize_merchant("AMZN Prime*123") == "amazonprime123"
+    assert normalize_merchant("Acme Inc. Subscription") == "acme"
+    assert normalize_merchant("AplPay STARBUCKS NY") == "starbucks"
+
+def test_noise_removed_in_order():
+    """Test that suffixes, locations and state codes are removed one after another."""
+    # Suffixes are removed before locations, so a location marker left at the end stays
+    assert normalize_merchant("Cafe at #12") == "cafeat"
+    assert normalize_merchant("STARBUCKS in Inc.") == "starbucksin"
+    assert clean_merchant_name("Cafe at #12") == "Cafe at"
+    # A state code before a location doesn't keep the location from being removed
+    assert normalize_merchant("PARKING NY at JFK") == "parking"
+    assert clean_merchant_name("PARKING NY at JFK") == "PARKING"
+
+def test_clean_merchant_name():
+    """Test that lookup names drop noise but keep case and spacing."""
+    assert clean_merchant_name("AplPay NETFLIX INC.") == "NETFLIX"
+    assert clean_merchant_name("Netflix Corp. in NEW YORK") == "Netflix"
+    assert clean_merchant_name("NETFLIX #123 NY") == "NETFLIX"
+    assert clean_merchant_name("Spotify Premium") == "Spotify Premium"
+
+def test_normalization_is_cached():
+    """Test that repeated merchant names are only normalized once."""
+    for normalize in (normalize_merchant, clean_merchant_name):
+        normalize.cache_clear()
+        for _ in range(3):
+            normalize("AplPay NETFLIX INC.")
+        info = normalize.cache_info()
+        assert (info.misses, info.hits) == (1, 2)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
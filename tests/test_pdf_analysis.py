@@ -2,10 +2,11 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from services.pdf_parser import parse_pdf
+from models.transaction import format_mdy
+from services.pdf_parser import parse_pdf_cached, parse_pdf_directory
 from services.transaction_finder import extract_transactions, group_similar_transactions, identify_recurring_transactions
 
-def analyze_pdf(pdf_path: str):
+def analyze_pdf(pdf_path: str, cache_dir: str = None):
     """Analyze a single PDF and print results in a human-readable format."""
     print(f"\n{'='*80}")
     print(f"Analyzing PDF: {os.path.basename(pdf_path)}")
@@ -13,7 +14,7 @@ def analyze_pdf(pdf_path: str):
     
     # Step 1: Extract text from PDF
     print("\n1. Extracting text from PDF...")
-    lines = parse_pdf(pdf_path)
+    lines = parse_pdf_cached(pdf_path, cache_dir=cache_dir)
     print(f"Found {len(lines)} lines of text")
     
     # Print first few lines as sample
@@ -33,17 +34,17 @@ def analyze_pdf(pdf_path: str):
     
     return transactions
 
-def analyze_directory(directory_path: str):
+def analyze_directory(directory_path: str, cache_dir: str = None):
     """Analyze all PDFs in a directory and identify recurring transactions."""
     print("\nAnalyzing all PDFs in directory...")
     
-    # Collect all transactions from all PDFs
+    # Parse all PDFs in parallel, reusing cached lines for unchanged files, then
+    # collect their transactions in listing order
     all_transactions = []
-    for filename in os.listdir(directory_path):
-        if filename.lower().endswith('.pdf'):
-            file_path = os.path.join(directory_path, filename)
-            transactions = analyze_pdf(file_path)
-            all_transactions.extend(transactions)
+    for filename, lines in parse_pdf_directory(directory_path, use_cache=True, cache_dir=cache_dir).items():
+        transactions = extract_transactions(lines)
+        print(f"{filename}: {len(lines)} lines of text, {len(transactions)} transactions")
+        all_transactions.extend(transactions)
     
     # Group similar transactions
     print(f"\n{'='*80}")
@@ -61,7 +62,7 @@ def analyze_directory(directory_path: str):
         print(f"  Average amount: ${avg:.2f}")
         print("  Dates:")
         for t in sorted(transactions, key=lambda x: x.date):
-            print(f"    {t.date.strftime('%m/%d/%Y')}: ${t.amount:.2f}")
+            print(f"    {format_mdy(t.date)}: ${t.amount:.2f}")
     
     # Identify recurring transactions
     print(f"\n{'='*80}")
@@ -79,7 +80,7 @@ def analyze_directory(directory_path: str):
         print(f"  Monthly cost: ${avg:.2f}")
         print("  Transaction history:")
         for t in sorted(transactions, key=lambda x: x.date):
-            print(f"    {t.date.strftime('%m/%d/%Y')}: ${t.amount:.2f}")
+            print(f"    {format_mdy(t.date)}: ${t.amount:.2f}")
     
     print(f"\nTotal potential monthly savings: ${total_monthly:.2f}")
 
@@ -1,17 +1,20 @@
 import sys
 import os
+import re
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from services.pdf_parser import parse_pdf
+from services.pdf_parser import parse_pdf_cached
 
-def examine_pdf_content(pdf_path: str):
+_HAS_DIGIT = re.compile(r'\d').search
+
+def examine_pdf_content(pdf_path: str, cache_dir: str = None):
     """Examine the raw content of a PDF file."""
     print(f"\n{'='*80}")
     print(f"Examining PDF: {os.path.basename(pdf_path)}")
     print(f"{'='*80}")
     
     # Extract text from PDF
-    lines = parse_pdf(pdf_path)
+    lines = parse_pdf_cached(pdf_path, cache_dir=cache_dir)
     
     print(f"\nTotal lines found: {len(lines)}")
     
@@ -19,12 +22,11 @@ def examine_pdf_content(pdf_path: str):
     print("\nPotential transaction patterns found:")
     print("-" * 80)
     
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
+    for i, line in enumerate(lines):
+        line = line.strip()
         
         # Look for date-like patterns
-        if any(c.isdigit() for c in line):
+        if _HAS_DIGIT(line):
             # Print the current line and next few lines for context
             print(f"\nLine {i+1}:")
             print(f"  {line}")
@@ -32,7 +34,6 @@ def examine_pdf_content(pdf_path: str):
                 if i + j < len(lines):
                     print(f"Line {i+j+1}:")
                     print(f"  {lines[i+j].strip()}")
-        i += 1
     
     print("\nFull content:")
     print("-" * 80)
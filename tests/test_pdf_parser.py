@@ -0,0 +1,118 @@
+import sys
+import os
+import pytest
+import tempfile
+from unittest.mock import patch
+import pypdfium2 as pdfium
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.pdf_parser import _PDFIUM_LOCK, iter_pdf_lines, parse_pdf, parse_pdf_cached, parse_pdf_directory
+
+@pytest.fixture
+def temp_dir():
+    """Fixture to create a temporary directory for test files."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield tmpdirname
+
+def create_test_pdf(path, *pages):
+    """Helper function to write a PDF with one page per list of text lines."""
+    page_count = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(page_count)), page_count),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, lines in enumerate(pages):
+        text = ' '.join(f"({line}) Tj T*" for line in lines)
+        stream = f"BT /F1 12 Tf 14 TL 72 720 Td {text} ET".encode()
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, obj in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (num, obj)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(pdf)
+
+def test_parse_pdf_cached(temp_dir):
+    """Test that unchanged PDFs are only parsed once."""
+    cache_dir = os.path.join(temp_dir, 'cache')
+    pdf_path = os.path.join(temp_dir, 'statement.pdf')
+    with open(pdf_path, 'wb') as f:
+        f.write(b'%PDF-1.4')
+    
+    with patch('services.pdf_parser.parse_pdf', return_value=['01/15/24 Netflix $19.99']) as mock_parse:
+        assert parse_pdf_cached(pdf_path, cache_dir=cache_dir) == ['01/15/24 Netflix $19.99']
+        assert parse_pdf_cached(pdf_path, cache_dir=cache_dir) == ['01/15/24 Netflix $19.99']
+        assert mock_parse.call_count == 1
+        
+        # Table extraction produces different lines, so it is cached separately
+        parse_pdf_cached(pdf_path, extract_tables=True, cache_dir=cache_dir)
+        assert mock_parse.call_count == 2
+        
+        # Modified files are parsed again
+        with open(pdf_path, 'ab') as f:
+            f.write(b'\n%%EOF')
+        parse_pdf_cached(pdf_path, cache_dir=cache_dir)
+        assert mock_parse.call_count == 3
+
+def test_parse_pdf_directory_single_file(temp_dir):
+    """Test that a lone PDF is parsed in-process and failures map to no lines."""
+    for filename in ('statement.pdf', 'notes.txt'):
+        with open(os.path.join(temp_dir, filename), 'wb') as f:
+            f.write(b'%PDF-1.4')
+    
+    with patch('services.pdf_parser.ProcessPoolExecutor') as mock_pool, \
+         patch('services.pdf_parser.parse_pdf', side_effect=ValueError("bad PDF")):
+        assert parse_pdf_directory(temp_dir) == {'statement.pdf': []}
+        mock_pool.assert_not_called()
+
+def test_parse_pdf_directory_cached(temp_dir):
+    """Test that directory parses reuse cached lines for unchanged PDFs."""
+    cache_dir = os.path.join(temp_dir, 'cache')
+    statements = os.path.join(temp_dir, 'statements')
+    os.mkdir(statements)
+    for filename in ('jan.pdf', 'feb.pdf'):
+        with open(os.path.join(statements, filename), 'wb') as f:
+            f.write(b'%PDF-1.4')
+    
+    with patch('services.pdf_parser.parse_pdf', return_value=['01/15/24 Netflix $19.99']) as mock_parse:
+        for _ in range(2):
+            results = parse_pdf_directory(statements, use_processes=False, use_cache=True, cache_dir=cache_dir)
+            assert results == {filename: ['01/15/24 Netflix $19.99'] for filename in os.listdir(statements)}
+        assert mock_parse.call_count == 2
+
+def test_suspended_parse_releases_pdfium_lock(temp_dir):
+    """Test that PDFs are extracted page by page without blocking other parses."""
+    first = os.path.join(temp_dir, 'first.pdf')
+    second = os.path.join(temp_dir, 'second.pdf')
+    create_test_pdf(first, ['01/15/24 Netflix $19.99', '01/16/24 Spotify $9.99'], ['02/15/24 Netflix $19.99'])
+    create_test_pdf(second, ['01/20/24 Hulu $7.99'])
+    
+    get_text = pdfium.PdfTextPage.get_text_bounded
+    with patch.object(pdfium.PdfTextPage, 'get_text_bounded', autospec=True, side_effect=get_text) as mock_get_text:
+        lines = iter_pdf_lines(first)
+        assert next(lines) == '01/15/24 Netflix $19.99'
+        assert not _PDFIUM_LOCK.locked()
+        
+        # Would deadlock if the suspended generator still held the lock
+        assert parse_pdf(second) == ['01/20/24 Hulu $7.99']
+        assert mock_get_text.call_count == 2
+        
+        # Page 2 is only extracted once page 1 has been consumed
+        assert next(lines) == '01/16/24 Spotify $9.99'
+        assert mock_get_text.call_count == 2
+        assert list(lines) == ['02/15/24 Netflix $19.99']
+        assert mock_get_text.call_count == 3
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,10 +1,11 @@
 import sys
 import os
 import pytest
+import dataclasses
 from datetime import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from models.transaction import Transaction
+from models.transaction import Transaction, format_mdy, parse_mdy
 
 def test_transaction_creation():
     """Test basic transaction creation with valid data."""
@@ -38,6 +39,14 @@ def test_transaction_from_string():
     assert transaction.credit_card == "Test Card"
     assert transaction.description == "Test Description"
 
+def test_from_string_interns_names():
+    """Test that repeated merchant and card names share one string object."""
+    first = Transaction.from_string("01/01/2024", " Netflix ", "$9.99", "Amex ")
+    second = Transaction.from_string("02/01/2024", "".join(["Net", "flix"]), "$9.99", "".join(["Am", "ex"]))
+    
+    assert first.merchant is second.merchant
+    assert first.credit_card is second.credit_card
+
 def test_transaction_amount_cleaning():
     """Test amount string cleaning with various formats."""
     test_cases = [
@@ -76,6 +85,20 @@ def test_invalid_amount():
             credit_card="Test Card"
         )
 
+def test_parse_mdy():
+    """Test fast and fallback MM/DD/YYYY date parsing."""
+    assert parse_mdy("01/15/2024") == datetime(2024, 1, 15)
+    assert parse_mdy("1/5/2024") == datetime(2024, 1, 5)
+    with pytest.raises(ValueError):
+        parse_mdy("13/01/2024")
+    with pytest.raises(ValueError):
+        parse_mdy("2024-01-01")
+
+def test_format_mdy():
+    """Test that dates format the same as strftime."""
+    for date in (datetime(2024, 1, 5), datetime(1999, 12, 31), datetime(2024, 10, 15, 13, 30)):
+        assert format_mdy(date) == date.strftime("%m/%d/%Y")
+
 def test_string_representation():
     """Test the string representation of a transaction."""
     transaction = Transaction(
@@ -89,5 +112,24 @@ def test_string_representation():
     expected = "01/01/2024 | Test Merchant | $99.99 | Test Card - Test Description"
     assert str(transaction) == expected
 
+def test_transaction_is_immutable_and_hashable():
+    """Test that transactions are frozen and can be deduplicated in a set."""
+    transaction = Transaction(
+        date=datetime(2024, 1, 1),
+        merchant="Test Merchant",
+        amount=99.99,
+        credit_card="Test Card"
+    )
+    duplicate = Transaction(
+        date=datetime(2024, 1, 1),
+        merchant="Test Merchant",
+        amount=99.99,
+        credit_card="Test Card"
+    )
+    
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        transaction.amount = 0.0
+    assert len({transaction, duplicate}) == 1
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"]) 
\ No newline at end of file
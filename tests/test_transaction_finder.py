@@ -1,8 +1,15 @@
 import sys
 import os
+import pytest
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from services.transaction_finder import extract_transactions, group_similar_transactions, identify_recurring_transactions
+from datetime import datetime
+from models.transaction import Transaction
+from services.transaction_finder import _RE_SKIP_LINE, _RE_TRANSACTION_LINE, _SKIP_KEYWORDS, _parse_short_date, extract_transactions, group_similar_transactions, identify_recurring_transactions, summarize_recurring_transactions, are_merchants_similar
+
+def make_transaction(merchant, day, month=1, amount=9.99):
+    """Helper function to create a 2024 transaction (January unless given)."""
+    return Transaction(date=datetime(2024, month, day), merchant=merchant, amount=amount, credit_card="Amex")
 
 def test_transaction_extraction():
     # Test data
@@ -41,6 +48,200 @@ def test_transaction_extraction():
         for t in transactions:
             print(f"  {t}")
 
+def test_skip_line_pattern():
+    for keyword in _SKIP_KEYWORDS:
+        assert _RE_SKIP_LINE.search(f"01/15/24 {keyword} $1.00")
+    # Keywords are matched literally, so "and/or" must not act as a regex
+    assert not _RE_SKIP_LINE.search("01/15/24 and or Cash $1.00")
+    assert not _RE_SKIP_LINE.search("01/15/24 Netflix $19.99")
+
+def test_transaction_line_pattern():
+    def amounts(line):
+        match = _RE_TRANSACTION_LINE.match(line)
+        return match and (match.group('date'), match.group('foreign'), match.group('foreign_usd'), match.group('usd'))
+    
+    assert amounts("01/15/24 Netflix $19.99") == ("01/15/24", None, None, "19.99")
+    assert amounts("01/16/24 FOO 12.50 $15.00") == ("01/16/24", "12.50", "15.00", None)
+    # The first USD amount is used, unless the line has a foreign currency amount anywhere
+    assert amounts("01/17/24 HOTEL $120.00 TIP $30.00") == ("01/17/24", None, None, "120.00")
+    assert amounts("01/18/24 FOO $5.00 3.00 $4.00") == ("01/18/24", "3.00", "4.00", None)
+    # Two adjacent USD amounts read as a foreign amount and its conversion, as they always have
+    assert amounts("01/19/24 HOTEL $1,200.00 $30.00") == ("01/19/24", "200.00", "30.00", None)
+    assert amounts("Netflix $19.99") is None
+    assert amounts("01/15/24 Netflix 19.99") is None
+
+def test_extract_transactions_amounts():
+    lines = [
+        "01/15/24 Netflix   $19.99",
+        "01/16/24 FOO LONDON 12.50 $15.00",
+        "01/17/24 HOTEL $120.00 TIP $30.00",
+        "Total $165.00",
+    ]
+    
+    transactions = extract_transactions(lines, credit_card="Amex Plat")
+    assert [(t.date, t.merchant, t.amount, t.credit_card) for t in transactions] == [
+        (datetime(2024, 1, 15), "Netflix", 19.99, "Amex Plat"),
+        (datetime(2024, 1, 16), "FOO LONDON", 15.0, "Amex Plat"),
+        (datetime(2024, 1, 17), "HOTEL $120.00 TIP", 120.0, "Amex Plat"),
+    ]
+
+def test_parse_short_date():
+    assert _parse_short_date("01/15/24") == datetime(2024, 1, 15)
+    assert _parse_short_date("12/31/99") == datetime(1999, 12, 31)
+    assert _parse_short_date("1/5/24") == datetime(2024, 1, 5)
+    with pytest.raises(ValueError):
+        _parse_short_date("13/01/24")
+
+def test_group_similar_transactions():
+    transactions = [
+        make_transaction("Netflix #123", 1),
+        make_transaction("Spotify USA", 2),
+        make_transaction("NETFLIX SUBSCRIPTION", 3),
+        make_transaction("Netflix #123", 4),
+        make_transaction("Spotify USA", 5),
+    ]
+    
+    grouped = group_similar_transactions(transactions)
+    assert list(grouped.keys()) == ["Netflix #123", "Spotify USA"]
+    assert [t.date.day for t in grouped["Netflix #123"]] == [1, 3, 4]
+    assert [t.date.day for t in grouped["Spotify USA"]] == [2, 5]
+
+def test_group_similar_transactions_length_and_prefix():
+    transactions = [
+        make_transaction("Amazon", 1),
+        make_transaction("Amazon Web Services Marketplace", 2),
+        make_transaction("The Athletic", 3),
+        make_transaction("Athletic", 4),
+    ]
+    
+    grouped = group_similar_transactions(transactions)
+    # Too different in length to ever reach the threshold
+    assert "Amazon Web Services Marketplace" in grouped
+    # Different first characters can still be similar enough to group
+    assert [t.merchant for t in grouped["The Athletic"]] == ["The Athletic", "Athletic"]
+
+def test_group_similar_transactions_not_transitive():
+    # B is similar to both A and C, but C is not similar to A, so C must not
+    # be pulled into A's group through B
+    transactions = [make_transaction("ABCDEFGHIJ", 1), make_transaction("ABCDEFGXYZ", 2), make_transaction("ABCDWVUXYZ", 3)]
+    
+    grouped = group_similar_transactions(transactions)
+    assert [t.merchant for t in grouped["ABCDEFGHIJ"]] == ["ABCDEFGHIJ", "ABCDEFGXYZ"]
+    assert [t.merchant for t in grouped["ABCDWVUXYZ"]] == ["ABCDWVUXYZ"]
+
+def test_group_similar_transactions_best_match():
+    # From the sample statements: KREA.AI is above the threshold for both
+    # groups (72 vs ANTHROPIC, 74 vs TASKRABBIT) and must join the closer one,
+    # not whichever group was created first
+    anthropic = "ANTHROPIC           SAN FRANCISCO       CA"
+    taskrabbit = "TASKER ON TASKRABBITSAN FRANCISCO       CA"
+    krea = "KREA.AI SAN FRANCISCO CA"
+    transactions = [make_transaction(anthropic, 1), make_transaction(taskrabbit, 2), make_transaction(krea, 3)]
+    
+    grouped = group_similar_transactions(transactions)
+    assert [t.merchant for t in grouped[anthropic]] == [anthropic]
+    assert [t.merchant for t in grouped[taskrabbit]] == [taskrabbit, krea]
+
+def test_group_similar_transactions_rounded_scores():
+    # Scores are rounded like thefuzz's integer scores before the threshold check:
+    # 69.57 counts as 70, and halves round to even, so 72.5 counts as 72
+    transactions = [make_transaction("HULUPLUS", 1), make_transaction("HULUPLUS GERMANY", 2)]
+    assert list(group_similar_transactions(transactions)) == ["HULUPLUS"]
+    assert len(group_similar_transactions(transactions, similarity_threshold=71)) == 2
+    
+    transactions = [make_transaction("A" * 29 + "B" * 11, 1), make_transaction("A" * 29 + "C" * 11, 2)]
+    assert len(group_similar_transactions(transactions, similarity_threshold=72)) == 1
+    assert len(group_similar_transactions(transactions, similarity_threshold=73)) == 2
+
+def test_identify_recurring_first_qualifying_group():
+    grouped = {
+        "Gym": [
+            # 50.00 group comes first but its intervals are all out of range
+            make_transaction("Gym", 1, 1, 50.0),
+            make_transaction("Gym", 1, 4, 50.0),
+            make_transaction("Gym", 1, 7, 50.0),
+            # 9.99 group qualifies; 10.50 is within 10% of its base amount
+            make_transaction("Gym", 5, 1, 9.99),
+            make_transaction("Gym", 5, 2, 10.50),
+            make_transaction("Gym", 5, 3, 9.99),
+            # 20.00 group qualifies too, but was created after the 9.99 group
+            make_transaction("Gym", 10, 1, 20.0),
+            make_transaction("Gym", 10, 2, 20.0),
+            make_transaction("Gym", 10, 3, 20.0),
+        ],
+        "Stream": [
+            make_transaction("Stream", 20, month, amount)
+            for month in (1, 2, 3) for amount in (30.0, 15.0)
+        ],
+    }
+    
+    recurring = identify_recurring_transactions(grouped)
+    assert [(t.date.month, t.amount) for t in recurring["Gym"]] == [(1, 9.99), (2, 10.50), (3, 9.99)]
+    assert [(t.date.month, t.amount) for t in recurring["Stream"]] == [(1, 30.0), (2, 30.0), (3, 30.0)]
+
+def test_identify_recurring_interval_gaps():
+    grouped = {
+        # Only one of the two intervals is within 35 days
+        "Gap": [make_transaction("Gap", 1, 1), make_transaction("Gap", 20, 1), make_transaction("Gap", 1, 6)],
+        # Starts 9 days after Gap's last charge, which must not count as an interval of Gap's group
+        "Next": [make_transaction("Next", 10, 6, 5.0), make_transaction("Next", 10, 7, 5.0), make_transaction("Next", 10, 8, 5.0)],
+    }
+    
+    recurring = identify_recurring_transactions(grouped)
+    assert list(recurring) == ["Next"]
+    assert identify_recurring_transactions(grouped, max_days_between=200).keys() == {"Gap", "Next"}
+
+def test_identify_recurring_skips_zero_amounts_and_rare_merchants():
+    grouped = {
+        "Netflix": [
+            make_transaction("Netflix", 1, 1, 0.0),
+            make_transaction("Netflix", 15, 1),
+            make_transaction("Netflix", 15, 2),
+            make_transaction("Netflix", 20, 2, 0.0),
+            make_transaction("Netflix", 15, 3),
+        ],
+        # Enough transactions, but none with a nonzero amount
+        "Refunds": [make_transaction("Refunds", 1, month, 0.0) for month in (1, 2, 3)],
+        # Monthly, but below min_occurrences
+        "Hulu": [make_transaction("Hulu", 1, month) for month in (1, 2)],
+    }
+    
+    recurring = identify_recurring_transactions(grouped)
+    assert list(recurring) == ["Netflix"]
+    assert [t.date for t in recurring["Netflix"]] == [datetime(2024, month, 15) for month in (1, 2, 3)]
+    assert identify_recurring_transactions(grouped, min_occurrences=2).keys() == {"Netflix", "Hulu"}
+
+def test_identify_recurring_keeps_merchant_order():
+    merchants = ["Zeta", "Alpha", "Mid"]
+    grouped = {
+        merchant: [make_transaction(merchant, 1, month) for month in (3, 1, 2)]
+        for merchant in merchants
+    }
+    
+    recurring = identify_recurring_transactions(grouped)
+    assert list(recurring) == merchants
+    # Transactions come back in date order
+    assert [t.date.month for t in recurring["Zeta"]] == [1, 2, 3]
+
+def test_are_merchants_similar():
+    assert are_merchants_similar("AplPay Netflix Inc", "NETFLIX")
+    # A single inserted character must not misalign the rest of the name
+    assert are_merchants_similar("Spotify Premium", "SSpotify Premium")
+    assert not are_merchants_similar("Netflix", "Spotify")
+    assert not are_merchants_similar("", "")
+
+def test_summarize_recurring_transactions():
+    recurring = {
+        "Netflix": [
+            Transaction(date=datetime(2024, 2, 15), merchant="Netflix", amount=20.0, credit_card="Chase"),
+            Transaction(date=datetime(2024, 3, 15), merchant="Netflix", amount=22.0, credit_card="Amex"),
+            Transaction(date=datetime(2024, 1, 15), merchant="Netflix", amount=18.0, credit_card="Chase"),
+        ]
+    }
+    
+    summaries = summarize_recurring_transactions(recurring)
+    assert summaries == {"Netflix": (20.0, "Amex", 3)}
+
 if __name__ == "__main__":
     print("Running transaction finder tests...")
     test_transaction_extraction() 
\ No newline at end of file